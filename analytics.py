@@ -0,0 +1,79 @@
+from functools import cached_property
+
+import pandas as pd
+
+from period_returns import compound_returns
+
+
+class PortfolioAnalytics:
+    """Return series shared by the figure builders of one optimization run.
+
+    Every series is computed on first access and memoized, so the price frame is only
+    turned into returns once no matter how many charts read from it.
+    """
+
+    def __init__(self, data, cleaned_weights, benchmark_data=None, benchmark_name=None, backtest_returns=None):
+        self.data = data
+        self.cleaned_weights = cleaned_weights
+        self.benchmark_data = benchmark_data
+        self.benchmark_name = benchmark_name
+        self.backtest_returns = backtest_returns
+
+    @cached_property
+    def weights(self):
+        return pd.Series(self.cleaned_weights)
+
+    @cached_property
+    def latest_prices(self):
+        return self.data.iloc[-1]
+
+    @cached_property
+    def returns(self):
+        """Daily simple returns of every asset."""
+        return self.data.pct_change()
+
+    @cached_property
+    def cumulative_returns(self):
+        """Cumulative return of every asset."""
+        return (1 + self.returns).cumprod() - 1
+
+    @cached_property
+    def portfolio_returns(self):
+        """Daily returns of the weighted portfolio; NaN where any asset has no return."""
+        return self.returns.dot(self.weights)
+
+    @cached_property
+    def portfolio_cumulative_returns(self):
+        return (1 + self.portfolio_returns.dropna()).cumprod() - 1
+
+    @cached_property
+    def monthly_returns(self):
+        """Compounded monthly returns of the portfolio."""
+        return compound_returns(self.portfolio_returns, 'M')
+
+    @cached_property
+    def annual_returns(self):
+        """Compounded annual returns of the portfolio."""
+        return compound_returns(self.portfolio_returns, 'A')
+
+    @cached_property
+    def benchmark_returns(self):
+        """Daily returns of the benchmark."""
+        return self.benchmark_data[self.benchmark_name].pct_change()
+
+    @cached_property
+    def combined_returns(self):
+        """Portfolio and benchmark daily returns over the dates both have."""
+        combined = pd.concat([self.portfolio_returns, self.benchmark_returns], axis=1)
+        combined.columns = ['Portfolio', 'Benchmark']
+        return combined.dropna()
+
+    @cached_property
+    def combined_monthly_returns(self):
+        """Compounded monthly returns of the portfolio and the benchmark."""
+        return compound_returns(self.combined_returns, 'M')
+
+    @cached_property
+    def backtest_monthly_returns(self):
+        """Compounded monthly returns of the walk-forward backtest."""
+        return compound_returns(self.backtest_returns, 'M')
@@ -0,0 +1,151 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pypfopt.exceptions import OptimizationError
+
+import instrumentation
+from frontier import RISK_AVERSION_LEVELS, make_frontier
+from period_returns import PERIOD_ALIASES
+from risk_estimators import estimate_risk_model
+
+TRADING_DAYS = 252
+
+
+def rolling_estimates(returns, rebalance_positions, window, expanding=False, frequency=TRADING_DAYS):
+    """Yields (mu, S) at each rebalance position, updating running sums as the window moves.
+
+    Each estimate uses the `window` returns before the position (all earlier returns when
+    `expanding`). mu is the compounded annual return and S the annualised sample covariance,
+    matching `mean_historical_return` and `sample_cov` on the same window.
+    """
+    log_growth = np.log1p(returns)
+    n_assets = returns.shape[1]
+    total = np.zeros(n_assets)
+    total_log = np.zeros(n_assets)
+    cross = np.zeros((n_assets, n_assets))
+    lo = hi = 0
+    for position in rebalance_positions:
+        new_lo = 0 if expanding else max(0, position - window)
+        entering, leaving = returns[hi:position], returns[lo:new_lo]
+        total += entering.sum(axis=0) - leaving.sum(axis=0)
+        total_log += log_growth[hi:position].sum(axis=0) - log_growth[lo:new_lo].sum(axis=0)
+        cross += entering.T @ entering - leaving.T @ leaving
+        lo, hi = new_lo, position
+        count = hi - lo
+        mean = total / count
+        mu = np.expm1(total_log * frequency / count)
+        S = (cross - count * np.outer(mean, mean)) / (count - 1) * frequency
+        yield mu, S
+
+
+def solve_window(mu, S, tickers, min_weight, max_weight, risk_aversion):
+    """Solves one rebalance with the dashboard's constraints and risk profile.
+
+    `S` is the window's covariance as an array, DataFrame or FactorCovariance.
+
+    Max-Sharpe has no solution when no asset is expected to beat the risk-free rate;
+    such windows fall back to the minimum-volatility portfolio.
+    """
+    mu = pd.Series(mu, index=tickers)
+    if isinstance(S, np.ndarray):
+        S = pd.DataFrame(S, index=tickers, columns=tickers)
+    ef = make_frontier(mu, S, min_weight, max_weight)
+    if risk_aversion in RISK_AVERSION_LEVELS:
+        ef.max_quadratic_utility(risk_aversion=RISK_AVERSION_LEVELS[risk_aversion])
+        instrumentation.record_solve(ef, 'backtest')
+        return ef.weights
+    try:
+        ef.max_sharpe()
+    except (OptimizationError, ValueError):
+        logging.warning("Max-Sharpe infeasible for a backtest window, using minimum volatility")
+        ef = make_frontier(mu, S, min_weight, max_weight)
+        ef.min_volatility()
+    instrumentation.record_solve(ef, 'backtest')
+    return ef.weights
+
+
+def _solve_window(args):
+    return solve_window(*args)
+
+
+def rebalance_positions(index, rebalance, window):
+    """Positions in the daily return `index` of the first trading day of every `rebalance` period after `window` returns."""
+    ordinals = index.to_period(PERIOD_ALIASES[rebalance]).asi8
+    starts = np.flatnonzero(np.diff(ordinals, prepend=ordinals[0] - 1) != 0)
+    return [int(position) for position in starts if position >= window]
+
+
+def walk_forward_backtest(prices, min_weight, max_weight, risk_aversion, window=TRADING_DAYS, rebalance='M', expanding=False, cost_bps=0.0, max_workers=None,
+                          risk_model='sample', n_factors=10, span=180):
+    """Backtests the optimized strategy without lookahead.
+
+    At the first trading day of every `rebalance` period ('W', 'M', 'Q' or 'A') once
+    `window` returns are available, weights are re-optimized on the trailing (or, when
+    `expanding`, all past) returns and then held, drifting with prices, until the next
+    rebalance. Each window's covariance comes from `risk_model` (updated incrementally for
+    'sample'), as in the headline solve. Only tickers with returns over the whole
+    estimation window are held, so a ticker is never bought before it lists. `cost_bps` is charged on turnover at each
+    rebalance. Window solves run in a process pool of `max_workers` processes (inline when 1).
+
+    Returns (daily strategy returns, weights per rebalance date).
+    """
+    returns = prices.pct_change().iloc[1:]
+    # Position of each ticker's first return; a ticker listed later has none before it.
+    traded = returns.notna().to_numpy()
+    first_returns = np.where(traded.any(axis=0), traded.argmax(axis=0), len(traded))
+    returns = returns.fillna(0.0)
+    values = returns.to_numpy()
+    tickers = list(returns.columns)
+
+    positions = rebalance_positions(returns.index, rebalance, window)
+    if not positions:
+        raise ValueError(f"Not enough history for a {window}-day estimation window")
+
+    held, jobs = [], []
+    for position, (mu, S) in zip(positions, rolling_estimates(values, positions, window, expanding)):
+        # Zero-filled returns before a listing would look riskless, so those tickers sit out the window.
+        start = 0 if expanding else position - window
+        eligible = np.flatnonzero(first_returns <= start)
+        held.append(eligible)
+        if not len(eligible):
+            continue
+        if risk_model == 'sample':
+            S = S[np.ix_(eligible, eligible)]
+        else:
+            # Returns start..position-1 are the changes between price rows start..position.
+            S = estimate_risk_model(prices.iloc[start:position + 1, eligible], risk_model, n_factors=n_factors, span=span)
+        jobs.append((mu[eligible], S, [tickers[i] for i in eligible], min_weight, max_weight, risk_aversion))
+    if max_workers == 1:
+        solved = [solve_window(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            solved = list(executor.map(_solve_window, jobs, chunksize=max(1, len(jobs) // 32)))
+    weights = np.zeros((len(positions), len(tickers)))
+    solved = iter(solved)
+    for row, eligible in zip(weights, held):
+        if len(eligible):
+            row[eligible] = next(solved)
+
+    strategy = np.zeros(len(values))
+    holdings = np.zeros(len(tickers))
+    bounds = positions + [len(values)]
+    for target, start, end in zip(weights, bounds[:-1], bounds[1:]):
+        turnover = np.abs(target - holdings).sum()
+        if not target.any():
+            # No ticker has a full window yet, so the strategy holds cash.
+            strategy[start] = -turnover * cost_bps / 10000
+            holdings = target
+            continue
+        growth = np.cumprod(1 + values[start:end], axis=0) @ target
+        segment = np.diff(growth, prepend=1.0) / np.concatenate([[1.0], growth[:-1]])
+        segment[0] -= turnover * cost_bps / 10000
+        strategy[start:end] = segment
+        drifted = target * np.prod(1 + values[start:end], axis=0)
+        holdings = drifted / drifted.sum()
+
+    first = positions[0]
+    strategy_returns = pd.Series(strategy[first:], index=returns.index[first:], name='Walk-Forward')
+    weights_frame = pd.DataFrame(weights, index=returns.index[positions], columns=tickers)
+    return strategy_returns, weights_frame
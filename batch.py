@@ -0,0 +1,64 @@
+"""Optimizes a file of portfolio configurations without the Dash app.
+
+Tickers are fetched once for the whole batch and the portfolios are solved across a
+process pool. Weights, discrete allocations and performance are written to the output
+directory as Parquet when pyarrow or fastparquet is installed, else as CSV.
+
+    python batch.py portfolios.json --output results --workers 8
+
+The configuration file is a JSON list (or a CSV with one row per portfolio) of objects
+with `tickers`, `start_date` and `end_date`, plus optional `name`, `investment`,
+`min_weight`, `max_weight`, `risk_aversion`, `risk_model` and `benchmark`.
+"""
+import argparse
+import logging
+
+import engine
+from price_cache import PriceCache
+from settings import API_KEY, POLYGON_BASE_URL, POLYGON_MAX_WORKERS, POLYGON_MAX_RETRIES, POLYGON_BACKOFF
+from settings import PRICE_CACHE_PATH, PRICE_CACHE_MAX_AGE_DAYS, PRICE_CACHE_MAX_TICKERS
+from settings import BACKTEST_WINDOW, BACKTEST_REBALANCE, BACKTEST_EXPANDING, BACKTEST_COST_BPS
+from settings import RISK_FACTORS, RISK_EWMA_SPAN
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('portfolios', help='JSON or CSV file of portfolio configurations')
+    parser.add_argument('--output', default='results', help='directory the result tables are written to')
+    parser.add_argument('--format', choices=['parquet', 'csv'], help='output format (default: Parquet when available)')
+    parser.add_argument('--workers', type=int, help='solver processes (default: every CPU)')
+    parser.add_argument('--no-backtest', action='store_true', help='skip the walk-forward backtest of each portfolio')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    portfolios = engine.load_portfolios(args.portfolios)
+    price_cache = PriceCache(PRICE_CACHE_PATH, max_age_days=PRICE_CACHE_MAX_AGE_DAYS, max_tickers=PRICE_CACHE_MAX_TICKERS) if PRICE_CACHE_PATH else None
+    polygon_options = {
+        'base_url': POLYGON_BASE_URL,
+        'max_workers': POLYGON_MAX_WORKERS,
+        'max_retries': POLYGON_MAX_RETRIES,
+        'backoff_factor': POLYGON_BACKOFF,
+    }
+    # Each portfolio already runs in its own process, so its backtest solves serially.
+    backtest = None if args.no_backtest else {
+        'window': BACKTEST_WINDOW,
+        'rebalance': BACKTEST_REBALANCE,
+        'expanding': BACKTEST_EXPANDING,
+        'cost_bps': BACKTEST_COST_BPS,
+        'max_workers': 1,
+    }
+    optimize_options = {'n_factors': RISK_FACTORS, 'span': RISK_EWMA_SPAN, 'backtest': backtest}
+
+    results, throughput = engine.run_batch(
+        portfolios, API_KEY, price_cache=price_cache, polygon_options=polygon_options,
+        optimize_options=optimize_options, max_workers=args.workers,
+    )
+    paths = engine.write_results(results, args.output, file_format=args.format)
+    failed = sum(result['error'] is not None for result in results)
+    print(f"{len(results)} portfolios ({failed} failed) at {throughput:.2f} portfolios/s")
+    for path in paths:
+        print(f"wrote {path}")
+
+
+if __name__ == '__main__':
+    main()
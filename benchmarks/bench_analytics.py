@@ -0,0 +1,72 @@
+"""Compares per-builder return computation with the shared PortfolioAnalytics context.
+
+The "per-builder" path repeats what each figure builder used to do on its own: call
+pct_change on the full price frame and rebuild the weighted portfolio series. Run from
+the repository root:
+
+    python -m benchmarks.bench_analytics --assets 500 --days 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import PortfolioAnalytics
+
+
+def synthetic_panel(n_assets, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range('2000-01-03', periods=n_days)
+    prices = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, (n_days, n_assets + 1)), axis=0))
+    columns = [f'A{i:03d}' for i in range(n_assets)] + ['BENCH']
+    frame = pd.DataFrame(prices, index=index, columns=columns)
+    weights = dict(zip(columns[:-1], rng.dirichlet(np.ones(n_assets))))
+    return frame[columns[:-1]], frame[['BENCH']], weights
+
+
+def per_builder(data, weights, benchmark_data):
+    # create_cumulative_return_chart
+    (1 + data.pct_change()).cumprod() - 1
+    # create_portfolio_growth_chart
+    portfolio_returns = data.pct_change().dot(pd.Series(weights))
+    combined = pd.concat([portfolio_returns, benchmark_data['BENCH'].pct_change()], axis=1).dropna()
+    # create_performance_table_data
+    weighted_returns = (data.pct_change().dropna() * pd.Series(weights)).sum(axis=1)
+    (1 + weighted_returns).cumprod() - 1
+    return combined
+
+
+def shared_context(data, weights, benchmark_data):
+    analytics = PortfolioAnalytics(data, weights, benchmark_data, 'BENCH')
+    analytics.cumulative_returns
+    analytics.portfolio_cumulative_returns
+    return analytics.combined_returns
+
+
+def best_of(function, repeats, *args):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', type=int, default=500)
+    parser.add_argument('--days', type=int, default=5000)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    data, benchmark_data, weights = synthetic_panel(args.assets, args.days)
+    old = best_of(per_builder, args.repeats, data, weights, benchmark_data)
+    new = best_of(shared_context, args.repeats, data, weights, benchmark_data)
+    print(f"panel: {args.days} days x {args.assets} assets")
+    print(f"per-builder    {old:.3f}s")
+    print(f"shared context {new:.3f}s ({old / new:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Times the headless batch engine over many portfolios drawn from one stub universe.
+
+Prices are fetched once for the whole batch; each worker count then solves every
+portfolio. Run from the repository root:
+
+    python -m benchmarks.bench_batch --portfolios 100 --universe 50 --workers 1 4 8
+"""
+import argparse
+import random
+
+import engine
+from benchmarks.stub_polygon import StubPolygonServer
+
+
+def make_portfolios(n_portfolios, universe, size, seed=0):
+    rng = random.Random(seed)
+    tickers = [f'T{i:03d}' for i in range(universe)]
+    return [
+        {
+            **engine.PORTFOLIO_DEFAULTS,
+            'name': f'portfolio-{i + 1}',
+            'tickers': rng.sample(tickers, size),
+            'start_date': '2018-01-01',
+            'end_date': '2022-12-31',
+            'max_weight': 0.3,
+            'risk_aversion': rng.choice(['low', 'medium', 'high']),
+        }
+        for i in range(n_portfolios)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--portfolios', type=int, default=100)
+    parser.add_argument('--universe', type=int, default=50)
+    parser.add_argument('--size', type=int, default=10, help='tickers per portfolio')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    portfolios = make_portfolios(args.portfolios, args.universe, args.size)
+    with StubPolygonServer(latency=0.0) as stub:
+        for workers in args.workers:
+            requests_before = stub.request_count
+            results, throughput = engine.run_batch(portfolios, 'stub-key', polygon_options={'base_url': stub.base_url}, max_workers=workers)
+            failed = sum(result['error'] is not None for result in results)
+            print(f"{workers:>2} workers: {throughput:.2f} portfolios/s, {stub.request_count - requests_before} requests, {failed} failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Compares serial and pooled price fetching against a local stub of the Polygon endpoint.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fetch --tickers 40 --latency 0.05 --workers 1 4 8 16
+"""
+import argparse
+import time
+
+import polygon_client
+from benchmarks.stub_polygon import StubPolygonServer, aggregate_body
+
+
+def run(n_tickers, latency, workers, fail_every=0):
+    tickers = [f'T{i:03d}' for i in range(n_tickers)]
+    # Generate every ticker's random walk (cached by the stub) up front, so the first
+    # (serial) run is not also charged for building the responses.
+    for ticker in tickers:
+        aggregate_body(ticker, '2020-01-01', '2020-12-31')
+    rows = []
+    with StubPolygonServer(latency=latency, fail_every=fail_every) as stub:
+        for max_workers in workers:
+            start = time.perf_counter()
+            data = polygon_client.fetch_polygon_data(
+                tickers, '2020-01-01', '2020-12-31', 'stub-key',
+                base_url=stub.base_url, max_workers=max_workers, backoff_factor=0.01,
+            )
+            elapsed = time.perf_counter() - start
+            rows.append((max_workers, elapsed, data.shape[1]))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub response latency in seconds')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--fail-every', type=int, default=0, help='Answer every n-th request with 429')
+    args = parser.parse_args()
+
+    rows = run(args.tickers, args.latency, args.workers, args.fail_every)
+    baseline = rows[0][1]
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'tickers':>8}")
+    for max_workers, elapsed, fetched in rows:
+        print(f"{max_workers:>8} {elapsed:>9.3f} {baseline / elapsed:>7.1f}x {fetched:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Compares the old list-of-dicts + pd.concat assembly with the array-based price matrix.
+
+Both paths start from already decoded aggregate pages, so only parsing and alignment are
+measured. Run from the repository root:
+
+    python -m benchmarks.bench_parse --tickers 500 --years 20
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stub_polygon import synthetic_bars
+from polygon_client import build_price_matrix
+
+
+def concat_path(tickers, pages):
+    frames = []
+    for ticker, results in zip(tickers, pages):
+        dates = [result['t'] for result in results]
+        prices = [result['c'] for result in results]
+        frames.append(pd.DataFrame(data=prices, index=pd.to_datetime(dates, unit='ms'), columns=[ticker]))
+    return pd.concat(frames, axis=1)
+
+
+def array_path(tickers, pages):
+    series = []
+    for results in pages:
+        count = len(results)
+        timestamps = np.fromiter((result['t'] for result in results), dtype=np.int64, count=count)
+        closes = np.fromiter((result['c'] for result in results), dtype=np.float64, count=count)
+        series.append((timestamps, closes))
+    return build_price_matrix(tickers, series)
+
+
+def measure(function, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=20)
+    args = parser.parse_args()
+
+    end = pd.Timestamp('2024-12-31')
+    start = end - pd.DateOffset(years=args.years)
+    tickers = [f'T{i:03d}' for i in range(args.tickers)]
+    # Stagger listing dates so the per-ticker indexes differ and alignment does real work.
+    pages = [synthetic_bars(ticker, (start + pd.Timedelta(days=i % 250)).strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')) for i, ticker in enumerate(tickers)]
+
+    old, old_time, old_peak = measure(concat_path, tickers, pages)
+    new, new_time, new_peak = measure(array_path, tickers, pages)
+    assert np.allclose(old.to_numpy(), new.to_numpy(), equal_nan=True)
+
+    print(f"panel: {new.shape[0]} days x {new.shape[1]} tickers")
+    print(f"{'path':>8} {'seconds':>9} {'peak MiB':>9}")
+    print(f"{'concat':>8} {old_time:>9.3f} {old_peak / 2**20:>9.1f}")
+    print(f"{'arrays':>8} {new_time:>9.3f} {new_peak / 2**20:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""Compares the cumulative-returns figure payload and build-plus-serialize time at full resolution and after downsampling.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_payload --tickers 20 --days 1250 5000 10000
+"""
+import argparse
+import time
+
+import plotly.graph_objects as go
+
+from benchmarks.bench_analytics import synthetic_panel
+from downsample import line_trace
+
+
+def full_resolution(cumulative_returns):
+    fig = go.Figure()
+    for ticker in cumulative_returns.columns:
+        fig.add_trace(go.Scatter(x=cumulative_returns.index, y=cumulative_returns[ticker], mode='lines', name=ticker))
+    return fig
+
+
+def downsampled(cumulative_returns, max_points, webgl_threshold):
+    webgl = cumulative_returns.size > webgl_threshold
+    fig = go.Figure()
+    for ticker in cumulative_returns.columns:
+        fig.add_trace(line_trace(cumulative_returns[ticker], name=ticker, max_points=max_points, webgl=webgl))
+    return fig.update_xaxes(type='date')
+
+
+def serialized_size(fig):
+    start = time.perf_counter()
+    payload = fig.to_json()
+    return len(payload.encode()), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=20)
+    parser.add_argument('--days', type=int, nargs='+', default=[1250, 5000, 10000])
+    parser.add_argument('--max-points', type=int, default=1000)
+    parser.add_argument('--webgl-threshold', type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'days':>6} {'full KiB':>9} {'full s':>7} {'lttb KiB':>9} {'lttb s':>7}")
+    for days in args.days:
+        data, _, _ = synthetic_panel(args.tickers, days)
+        cumulative_returns = (1 + data.pct_change()).cumprod() - 1
+        start = time.perf_counter()
+        fig = full_resolution(cumulative_returns)
+        full_build_time = time.perf_counter() - start
+        full_bytes, full_time = serialized_size(fig)
+        start = time.perf_counter()
+        fig = downsampled(cumulative_returns, args.max_points, args.webgl_threshold)
+        build_time = time.perf_counter() - start
+        small_bytes, small_time = serialized_size(fig)
+        print(f"{days:>6} {full_bytes / 1024:>9.0f} {full_build_time + full_time:>7.3f} {small_bytes / 1024:>9.0f} {build_time + small_time:>7.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compares resample().apply(lambda) compounding with period_returns.compound_returns.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_period_returns --series 500 --days 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from period_returns import compound_returns
+
+# pandas 2.2 renamed the period-end resample aliases; fall back to the old names before that.
+try:
+    pd.tseries.frequencies.to_offset('ME')
+    RESAMPLE_ALIASES = {'W': 'W', 'M': 'ME', 'Q': 'QE', 'A': 'YE'}
+except ValueError:
+    RESAMPLE_ALIASES = {'W': 'W', 'M': 'M', 'Q': 'Q', 'A': 'A'}
+
+
+def lambda_path(returns, freq):
+    return returns.resample(RESAMPLE_ALIASES[freq]).apply(lambda x: (1 + x).prod() - 1)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--series', type=int, default=500)
+    parser.add_argument('--days', type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range('2000-01-03', periods=args.days)
+    returns = pd.DataFrame(rng.normal(0.0003, 0.015, (args.days, args.series)), index=index)
+
+    print(f"panel: {args.days} days x {args.series} series")
+    print(f"{'freq':>5} {'lambda s':>9} {'vector s':>9} {'speedup':>8}")
+    for freq in ['W', 'M', 'Q', 'A']:
+        expected, old = timed(lambda_path, returns, freq)
+        result, new = timed(compound_returns, returns, freq)
+        assert np.allclose(expected.to_numpy(), result.to_numpy())
+        print(f"{freq:>5} {old:>9.3f} {new:>9.3f} {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Times cold, warm and incremental (end date moved forward) fetches through the price cache.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_price_cache --tickers 40 --latency 0.05
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import polygon_client
+from benchmarks.stub_polygon import StubPolygonServer
+from price_cache import PriceCache
+
+
+def run(n_tickers, latency, max_workers):
+    tickers = [f'T{i:03d}' for i in range(n_tickers)]
+    rows = []
+    with tempfile.TemporaryDirectory() as directory, StubPolygonServer(latency=latency) as stub:
+        cache = PriceCache(os.path.join(directory, 'prices.sqlite'))
+
+        def fetch_ranges(ranges):
+            return polygon_client.fetch_ranges(ranges, 'stub-key', base_url=stub.base_url, max_workers=max_workers)
+
+        for label, end_date in [('cold', '2020-12-30'), ('warm', '2020-12-30'), ('top-up', '2020-12-31')]:
+            requests_before = stub.request_count
+            start = time.perf_counter()
+            data = cache.get_prices(tickers, '2015-01-01', end_date, fetch_ranges)
+            elapsed = time.perf_counter() - start
+            rows.append((label, elapsed, stub.request_count - requests_before, data.shape))
+        stats = cache.stats
+    return rows, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=40)
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub response latency in seconds')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    rows, stats = run(args.tickers, args.latency, args.workers)
+    print(f"{'run':>8} {'seconds':>9} {'requests':>9} {'shape':>12}")
+    for label, elapsed, requests_made, shape in rows:
+        print(f"{label:>8} {elapsed:>9.3f} {requests_made:>9} {str(shape):>12}")
+    print(f"cache stats: {stats}")
+
+
+if __name__ == '__main__':
+    main()
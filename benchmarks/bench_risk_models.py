@@ -0,0 +1,54 @@
+"""Times each risk model's estimation and quadratic-utility solve across universe sizes.
+
+The factor model is solved both in low-rank form and from its dense covariance.
+Run from the repository root:
+
+    python -m benchmarks.bench_risk_models --assets 100 500 1000 --days 1250
+"""
+import argparse
+import time
+
+from pypfopt import expected_returns
+
+import risk_estimators
+from benchmarks.bench_analytics import synthetic_panel
+from frontier import make_frontier
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def solve_time(mu, S, max_weight, risk_aversion):
+    ef = make_frontier(mu, S, 0.0, max_weight)
+    _, elapsed = timed(ef.max_quadratic_utility, risk_aversion=risk_aversion)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assets', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--days', type=int, default=1250)
+    parser.add_argument('--factors', type=int, default=10)
+    parser.add_argument('--max-weight', type=float, default=0.05)
+    parser.add_argument('--risk-aversion', type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{'assets':>6} {'model':>12} {'estimate s':>11} {'solve s':>8} {'total s':>8}")
+    for assets in args.assets:
+        data, _, _ = synthetic_panel(assets, args.days)
+        mu = expected_returns.mean_historical_return(data)
+        for method in risk_estimators.RISK_MODELS:
+            S, estimate_time = timed(risk_estimators.estimate_risk_model, data, method, n_factors=args.factors)
+            runs = [(method, S)]
+            if method == 'factor':
+                runs.append(('factor dense', S.to_dense()))
+            for name, covariance in runs:
+                elapsed = solve_time(mu, covariance, args.max_weight, args.risk_aversion)
+                print(f"{assets:>6} {name:>12} {estimate_time:>11.3f} {elapsed:>8.3f} {estimate_time + elapsed:>8.3f}")
+
+
+if __name__ == '__main__':
+    main()
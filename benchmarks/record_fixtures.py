@@ -0,0 +1,37 @@
+"""Records live Polygon daily aggregates as fixtures the stub server can replay.
+
+Needs POLYGON_API_KEY. Each ticker is saved as `<TICKER>.json` in the output directory:
+
+    python -m benchmarks.record_fixtures AAPL MSFT SPY --start 2015-01-01 --end 2024-12-31 --output fixtures
+"""
+import argparse
+import json
+import os
+
+import polygon_client
+from settings import API_KEY, POLYGON_BASE_URL
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('tickers', nargs='+')
+    parser.add_argument('--start', required=True)
+    parser.add_argument('--end', required=True)
+    parser.add_argument('--output', default='fixtures')
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    session = polygon_client.get_session(1)
+    for ticker in args.tickers:
+        bars = polygon_client.fetch_ticker(session, ticker, args.start, args.end, API_KEY, base_url=POLYGON_BASE_URL)
+        if bars is None:
+            continue
+        timestamps, closes = bars
+        results = [{'t': t, 'c': c} for t, c in zip(timestamps.tolist(), closes.tolist())]
+        with open(os.path.join(args.output, f'{ticker}.json'), 'w') as f:
+            json.dump({'ticker': ticker, 'status': 'OK', 'resultsCount': len(results), 'results': results}, f)
+        print(f"{ticker}: {len(results)} bars")
+
+
+if __name__ == '__main__':
+    main()
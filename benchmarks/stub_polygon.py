@@ -0,0 +1,136 @@
+"""Local stand-in for the Polygon aggregates endpoint, used by the benchmarks."""
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+AGGS_PATH = re.compile(r'^/v2/aggs/ticker/(?P<ticker>[^/]+)/range/1/day/(?P<start>[\d-]+)/(?P<end>[\d-]+)$')
+
+
+ANCHOR_DATES = pd.bdate_range('1990-01-01', '2030-12-31')
+ANCHOR_MS = ((ANCHOR_DATES - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)).to_numpy()
+
+
+@lru_cache(maxsize=None)
+def ticker_walk(ticker):
+    """Returns a deterministic random-walk close series (seeded by the ticker) over ANCHOR_DATES."""
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+    return np.round(100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, len(ANCHOR_DATES)))), 4)
+
+
+def parse_bound(value):
+    """Parses a path date bound, given as YYYY-MM-DD or epoch milliseconds like Polygon accepts."""
+    return pd.Timestamp(int(value), unit='ms') if value.isdigit() else pd.Timestamp(value)
+
+
+def synthetic_bars(ticker, start_date, end_date):
+    """Returns daily bars for business days between `start_date` and `end_date`."""
+    lo = ANCHOR_DATES.searchsorted(parse_bound(start_date))
+    hi = ANCHOR_DATES.searchsorted(parse_bound(end_date), side='right')
+    closes = ticker_walk(ticker)[lo:hi].tolist()
+    stamps = ANCHOR_MS[lo:hi].tolist()
+    return [{'t': t, 'c': c, 'o': c, 'h': c, 'l': c, 'v': 1000} for t, c in zip(stamps, closes)]
+
+
+@lru_cache(maxsize=None)
+def recorded_bars(path):
+    """Loads the bars of a recorded aggregates response, sorted by timestamp."""
+    with open(path) as f:
+        return sorted(json.load(f).get('results', []), key=lambda bar: bar['t'])
+
+
+def fixture_bars(fixtures, ticker, start_date, end_date):
+    """Returns the recorded bars of `ticker` in `fixtures` between the bounds, or synthetic bars without a recording."""
+    path = os.path.join(fixtures, f'{ticker}.json') if fixtures else None
+    if path is None or not os.path.exists(path):
+        return synthetic_bars(ticker, start_date, end_date)
+    start = (parse_bound(start_date) - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+    end = (parse_bound(end_date) + pd.Timedelta(days=1) - pd.Timestamp(0)) // pd.Timedelta(milliseconds=1)
+    return [bar for bar in recorded_bars(path) if start <= bar['t'] < end]
+
+
+@lru_cache(maxsize=4096)
+def aggregate_body(ticker, start_date, end_date, limit=5000, base_url='', fixtures=None):
+    """Returns the encoded aggregates response for one page, with `next_url` when more bars remain."""
+    results = fixture_bars(fixtures, ticker, start_date, end_date)
+    payload = {'ticker': ticker, 'status': 'OK', 'resultsCount': min(len(results), limit), 'results': results[:limit]}
+    if len(results) > limit:
+        payload['next_url'] = f"{base_url}/v2/aggs/ticker/{ticker}/range/1/day/{results[limit]['t']}/{end_date}?limit={limit}"
+    return json.dumps(payload).encode()
+
+
+class StubPolygonServer:
+    """Threaded HTTP server that answers aggregate requests after `latency` seconds.
+
+    `fail_every` makes every n-th request answer 429 so retries are exercised, and
+    `page_size` caps the bars per response so pagination is exercised. Tickers with a
+    `<TICKER>.json` recording in the `fixtures` directory are answered from it.
+    """
+
+    def __init__(self, latency=0.05, fail_every=0, page_size=5000, port=0, fixtures=None):
+        self.latency = latency
+        self.fixtures = fixtures
+        self.fail_every = fail_every
+        self.page_size = page_size
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub._lock:
+                    stub.request_count += 1
+                    count = stub.request_count
+                time.sleep(stub.latency)
+                url = urlparse(self.path)
+                match = AGGS_PATH.match(url.path)
+                if stub.fail_every and count % stub.fail_every == 0:
+                    self._send(429, {'status': 'ERROR', 'error': 'rate limited'})
+                elif match is None:
+                    self._send(404, {'status': 'NOT_FOUND'})
+                else:
+                    limit = min(int(parse_qs(url.query).get('limit', ['5000'])[0]), stub.page_size)
+                    self._send(200, aggregate_body(match['ticker'], match['start'], match['end'], limit, stub.base_url, stub.fixtures))
+
+            def _send(self, status, payload):
+                body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
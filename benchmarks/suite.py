@@ -0,0 +1,186 @@
+"""Times every stage of an Optimize run over a grid of ticker counts and history lengths.
+
+The dashboard code runs against a local stub of the Polygon endpoint, which serves
+synthetic bars or, with --fixtures, bars recorded by `benchmarks.record_fixtures`, so no
+API key or network access is needed. Each cell times the price fetch, return and
+covariance estimation, the efficient frontier solves, DiscreteAllocation, every chart
+builder, figure serialization and the whole run, and the median of the repeats is saved
+as JSON. With --baseline, any step slower than the baseline by more than --tolerance
+(and by more than --min-delta seconds) is reported and the exit status is 1.
+
+    python -m benchmarks.suite --tickers 5 20 50 --years 1 5 --output bench.json
+    python -m benchmarks.suite --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.stub_polygon import StubPolygonServer
+
+BENCHMARK = 'SPY'
+END_DATE = '2022-12-30'
+
+
+def load_main(base_url, job_cache_path):
+    """Imports the dashboard against the stub, with the price, result and metric caches disabled."""
+    os.environ.update(
+        POLYGON_API_KEY='stub-key', POLYGON_BASE_URL=base_url, JOB_CACHE_PATH=job_cache_path,
+        PRICE_CACHE_PATH='', RESULT_CACHE_PATH='', METRICS_PATH='', PROFILE_PATH='',
+    )
+    return importlib.import_module('main')
+
+
+def run_cell(main, tickers, start_date, risk_aversion, investment=100000, min_weight=0.0, max_weight=0.5):
+    """Runs every stage once and returns the seconds each took."""
+    import engine
+    import risk_estimators
+    from analytics import PortfolioAnalytics
+    from frontier import optimize_with_frontier
+    from pypfopt import expected_returns
+
+    timings = {}
+
+    def timed(step, function, *args, **kwargs):
+        start = time.perf_counter()
+        result = function(*args, **kwargs)
+        timings[step] = time.perf_counter() - start
+        return result
+
+    combined_data = timed('fetch', main.fetch_polygon_data, tickers + [BENCHMARK], start_date, END_DATE)
+    data = combined_data[tickers].dropna(how='all')
+    benchmark_data = combined_data[[BENCHMARK]].dropna(how='all')
+
+    mu = timed('estimate_returns', expected_returns.mean_historical_return, data)
+    S = timed('estimate_covariance', risk_estimators.estimate_risk_model, data, 'sample')
+    ef, frontier = timed('efficient_frontier', optimize_with_frontier, mu, S, min_weight, max_weight, risk_aversion)
+    weights, performance = ef.clean_weights(), ef.portfolio_performance(verbose=False)
+
+    analytics = PortfolioAnalytics(data, weights, benchmark_data, BENCHMARK)
+    timed('discrete_allocation', engine.discrete_allocation, weights, analytics.latest_prices, investment)
+    figures = {
+        'pie-chart': timed('create_pie_chart', main.create_pie_chart, weights),
+        'performance-chart': timed('create_performance_chart', main.create_performance_chart, performance),
+        'weight-allocation': timed('create_weight_allocation_chart', main.create_weight_allocation_chart, analytics, investment),
+        'cumulative-return': timed('create_cumulative_return_chart', main.create_cumulative_return_chart, analytics),
+        'portfolio-growth': timed('create_portfolio_growth_chart', main.create_portfolio_growth_chart, analytics),
+        'monthly-returns': timed('create_monthly_returns_chart', main.create_monthly_returns_chart, analytics),
+        'annual-returns': timed('create_annual_returns_chart', main.create_annual_returns_chart, analytics),
+        'efficient-frontier': timed('create_efficient_frontier_chart', main.create_efficient_frontier_chart, frontier, performance),
+    }
+    table = timed('create_performance_table_data', main.create_performance_table_data, performance, analytics)
+    timed('serialize', main.serialize_results, figures, table)
+
+    timed('optimize_run', main.run_optimization, lambda update: None, ', '.join(tickers), start_date, END_DATE, investment, min_weight, max_weight, risk_aversion, 'sample', BENCHMARK)
+    return timings
+
+
+def run_suite(ticker_counts, years, repeats, risk_aversion, fixtures=None, latency=0.0):
+    """Returns one record per (ticker count, history length, step) with the median and min seconds."""
+    records = []
+    with tempfile.TemporaryDirectory() as job_cache_path, StubPolygonServer(latency=latency, fixtures=fixtures) as stub:
+        main = load_main(stub.base_url, job_cache_path)
+        for n_tickers in ticker_counts:
+            tickers = fixture_tickers(fixtures, n_tickers)
+            for n_years in years:
+                start_date = date.fromisoformat(END_DATE).replace(year=date.fromisoformat(END_DATE).year - n_years).isoformat()
+                runs = [run_cell(main, tickers, start_date, risk_aversion) for _ in range(repeats)]
+                for step in runs[0]:
+                    samples = [run[step] for run in runs]
+                    records.append({
+                        'tickers': n_tickers, 'years': n_years, 'step': step,
+                        'median': statistics.median(samples), 'min': min(samples), 'repeats': repeats,
+                    })
+                total = statistics.median(run['optimize_run'] for run in runs)
+                print(f"{n_tickers:>4} tickers x {n_years:>2} years: optimize run {total:.3f}s", file=sys.stderr)
+    return records
+
+
+def fixture_tickers(fixtures, n_tickers):
+    """Picks `n_tickers` recorded tickers (other than the benchmark), topped up with synthetic ones."""
+    recorded = []
+    if fixtures:
+        recorded = sorted(name[:-5] for name in os.listdir(fixtures) if name.endswith('.json') and name[:-5] != BENCHMARK)
+    return (recorded + [f'T{i:03d}' for i in range(n_tickers)])[:n_tickers]
+
+
+def environment():
+    """Describes the machine and library versions a run was measured with."""
+    import cvxpy
+    import plotly
+    import pypfopt
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'cvxpy': cvxpy.__version__,
+        'pypfopt': pypfopt.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+def compare(records, baseline, tolerance, min_delta):
+    """Returns the records whose median is slower than the same baseline step beyond the tolerance."""
+    reference = {(record['tickers'], record['years'], record['step']): record['median'] for record in baseline['results']}
+    regressions = []
+    for record in records:
+        before = reference.get((record['tickers'], record['years'], record['step']))
+        if before is None:
+            continue
+        if record['median'] > before * (1 + tolerance) and record['median'] - before > min_delta:
+            regressions.append(dict(record, baseline=before, ratio=record['median'] / before))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, nargs='+', default=[5, 20, 50])
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 5])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--risk', default='medium', choices=['low', 'medium', 'high'])
+    parser.add_argument('--fixtures', help='directory of recorded <TICKER>.json aggregates')
+    parser.add_argument('--latency', type=float, default=0.0, help='stub response latency in seconds')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown as a fraction of the baseline')
+    parser.add_argument('--min-delta', type=float, default=0.005, help='slowdowns below this many seconds are ignored')
+    args = parser.parse_args()
+
+    records = run_suite(args.tickers, args.years, args.repeats, args.risk, fixtures=args.fixtures, latency=args.latency)
+    with open(args.output, 'w') as f:
+        json.dump({'environment': environment(), 'grid': {'tickers': args.tickers, 'years': args.years}, 'results': records}, f, indent=2)
+
+    print(f"{'tickers':>7} {'years':>5} {'step':<32} {'median s':>9} {'min s':>8}")
+    for record in records:
+        print(f"{record['tickers']:>7} {record['years']:>5} {record['step']:<32} {record['median']:>9.4f} {record['min']:>8.4f}")
+    print(f"wrote {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(records, baseline, args.tolerance, args.min_delta)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['tickers']} tickers x {regression['years']} years {regression['step']}: "
+                f"{regression['median']:.4f}s vs {regression['baseline']:.4f}s ({regression['ratio']:.2f}x)"
+            )
+        if regressions:
+            sys.exit(1)
+        print(f"no regressions beyond {args.tolerance:.0%} of {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,15 +2,19 @@
 import dash_bootstrap_components as dbc
 from dash import dcc
 from dash import html, dcc,dash_table
+from risk_estimators import RISK_MODELS
 
 
 def create_main_content():
     """Creates the main content area with graphs and tables."""
     return dbc.Col([
+        dcc.Store(id='results-store'),
+        dcc.Location(id='url', refresh=False),
         dbc.Row([create_pie_chart_col(), create_performance_chart_col()], style={'margin-bottom': '10px'}),
         dbc.Row([create_cumulative_return_col(), create_weight_allocation_col()]),
         dbc.Row([create_portfolio_growth_col(), create_performance_table_col()]),
-        dbc.Row([create_monthly_returns_col(), create_annual_returns_col()])
+        dbc.Row([create_monthly_returns_col(), create_annual_returns_col()]),
+        dbc.Row([create_efficient_frontier_col()])
     ], width=9, style={'padding': '10px'})
 
 
@@ -34,9 +38,13 @@ def create_sidebar():
             dcc.Input(id='max_weight', type='number', placeholder='Max Weight (e.g., 0.5)', style={'width': '100%', 'margin-bottom': '10px'}),
             html.Div([html.I(className="fas fa-exclamation-triangle", style={'margin-right': '10px'}), html.Label("Risk Aversion:", style={'color': 'white', 'font-family': 'Roboto, sans-serif'})], style={'display': 'flex', 'align-items': 'center', 'margin-bottom': '10px'}),
             dcc.Dropdown(id='risk_aversion', options=[{'label': 'Low', 'value': 'low'}, {'label': 'Medium', 'value': 'medium'}, {'label': 'High', 'value': 'high'}], value='medium', style={'width': '100%', 'margin-bottom': '10px'}),
+            html.Div([html.I(className="fas fa-project-diagram", style={'margin-right': '10px'}), html.Label("Risk Model:", style={'color': 'white', 'font-family': 'Roboto, sans-serif'})], style={'display': 'flex', 'align-items': 'center', 'margin-bottom': '10px'}),
+            dcc.Dropdown(id='risk_model', options=[{'label': label, 'value': value} for value, label in RISK_MODELS.items()], value='sample', style={'width': '100%', 'margin-bottom': '10px'}),
             html.Div([html.I(className="fas fa-chart-line", style={'margin-right': '10px'}), html.Label("Benchmark Index (e.g., SPY):", style={'color': 'white', 'font-family': 'Roboto, sans-serif'})], style={'display': 'flex', 'align-items': 'center', 'margin-bottom': '10px'}),
             dcc.Input(id='benchmark', type='text', placeholder='Benchmark Index (e.g., SPY)', style={'width': '100%', 'margin-bottom': '10px'}),
             html.Button('Optimize', id='submit-button', n_clicks=0, style={'width': '100%', 'background-color': '#007bff', 'color': 'white', 'border': 'none', 'padding': '10px'}),
+            dbc.Progress(id='optimize-progress', value=0, label='', striped=True, animated=True, style={'margin-top': '10px'}),
+            html.Button('Cancel', id='cancel-button', n_clicks=0, disabled=True, style={'width': '100%', 'background-color': '#6c757d', 'color': 'white', 'border': 'none', 'padding': '10px', 'margin-top': '10px'}),
             html.Hr(style={'background-color': 'white'}),
             html.P('"An investment in knowledge pays the best interest." - Benjamin Franklin', style={'color': 'white', 'font-family': 'Roboto, sans-serif', 'font-size': '14px', 'text-align': 'center', 'margin-top': '20px'}),
         ], style={'background-color': '#343a40', 'padding': '20px', 'border-radius': '10px', 'color': 'white'}),
@@ -94,4 +102,10 @@ def create_annual_returns_col():
     return dbc.Col([
         html.Div([html.I(className="fas fa-calendar", style={'margin-right': '10px'}), html.H5("Annual Returns", style={'color': 'white', 'font-family': 'Roboto, sans-serif'})], style={'display': 'flex', 'align-items': 'center', 'margin-bottom': '10px'}),
         dcc.Graph(id='annual-returns', style={'background-color': '#282c34', 'color': 'white', 'border-radius': '10px'})
-    ], width=6)
\ No newline at end of file
+    ], width=6)
+
+def create_efficient_frontier_col():
+    return dbc.Col([
+        html.Div([html.I(className="fas fa-chart-area", style={'margin-right': '10px'}), html.H5("Efficient Frontier", style={'color': 'white', 'font-family': 'Roboto, sans-serif'})], style={'display': 'flex', 'align-items': 'center', 'margin-bottom': '10px'}),
+        dcc.Graph(id='efficient-frontier', style={'background-color': '#282c34', 'color': 'white', 'border-radius': '10px'})
+    ], width=12)
@@ -1,14 +1,10 @@
-
 import dash
 import dash_bootstrap_components as dbc
-import os
-from dotenv import load_dotenv
+import diskcache
 
-load_dotenv()
+from settings import JOB_CACHE_PATH
 
-app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY])
-app.config.suppress_callback_exceptions = True
+background_callback_manager = dash.DiskcacheManager(diskcache.Cache(JOB_CACHE_PATH))
 
-API_KEY = os.environ.get('POLYGON_API_KEY')
-if not API_KEY:
-    raise ValueError("POLYGON_API_KEY environment variable not set.")
\ No newline at end of file
+app = dash.Dash(__name__, external_stylesheets=[dbc.themes.DARKLY], background_callback_manager=background_callback_manager)
+app.config.suppress_callback_exceptions = True
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def lttb_indices(x, y, threshold):
+    """Picks `threshold` points of (x, y) with a vectorized Largest-Triangle-Three-Buckets.
+
+    The first and last points are kept; every bucket in between keeps the point that
+    forms the largest triangle with the previous and the next bucket's averages, which
+    preserves peaks and troughs that plain striding would drop. Using the previous
+    bucket's average instead of its kept point lets all buckets be scored at once.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    counts = np.diff(edges)
+    # Bucket averages, with the first and last points standing in for the buckets on either side.
+    average_x = np.concatenate([x[:1], np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts, x[-1:]])
+    average_y = np.concatenate([y[:1], np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts, y[-1:]])
+    bucket = np.repeat(np.arange(threshold - 2), counts)
+    previous_x, previous_y = average_x[bucket], average_y[bucket]
+    next_x, next_y = average_x[bucket + 2], average_y[bucket + 2]
+    inner_x, inner_y = x[1:n - 1], y[1:n - 1]
+    area = np.abs((previous_x - next_x) * (inner_y - previous_y) - (previous_x - inner_x) * (next_y - previous_y))
+    # First point of each bucket reaching that bucket's largest area.
+    is_max = area == np.maximum.reduceat(area, edges[:-1] - 1)[bucket]
+    candidates = np.flatnonzero(is_max)
+    _, first = np.unique(bucket[candidates], return_index=True)
+    return np.concatenate([[0], candidates[first] + 1, [n - 1]])
+
+
+def epoch_ms(index):
+    """Returns a DatetimeIndex as float64 epoch milliseconds."""
+    return pd.DatetimeIndex(index).as_unit('ms').asi8.astype(np.float64)
+
+
+def line_trace(series, name=None, max_points=1000, webgl=False, **kwargs):
+    """Builds a compact line trace for a date-indexed series.
+
+    NaNs are dropped, the series is downsampled to `max_points` with LTTB, and the
+    points are sent as typed arrays: dates as float64 epoch milliseconds and values as
+    float32. Plot it on an axis with `type='date'`.
+    """
+    series = series.dropna()
+    x = epoch_ms(series.index)
+    y = series.to_numpy(dtype=np.float64)
+    keep = lttb_indices(x, y, max_points)
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(x=x[keep], y=y[keep].astype(np.float32), mode='lines', name=series.name if name is None else name, **kwargs)
+
+
+def bar_trace(series, **kwargs):
+    """Builds a bar trace for a date-indexed series with typed-array dates and values."""
+    x = epoch_ms(series.index)
+    return go.Bar(x=x, y=series.to_numpy(dtype=np.float32), **kwargs)
+
+
+def thin_ticks(dates, max_ticks=24):
+    """Keeps every n-th date so at most `max_ticks` tick labels are sent."""
+    return dates[::max(1, -(-len(dates) // max_ticks))]
+
+
+def payload_sizes(serialized):
+    """Returns the byte size of each serialized figure."""
+    return {figure_id: len(payload.encode()) for figure_id, payload in serialized.items()}
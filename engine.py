@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+
+import pandas as pd
+from pypfopt import expected_returns, DiscreteAllocation
+
+import instrumentation
+import polygon_client
+from analytics import PortfolioAnalytics
+from backtest import rebalance_positions, walk_forward_backtest
+from frontier import optimize_with_frontier
+from result_cache import canonical_key
+from risk_estimators import estimate_risk_model
+
+# Settings a batch configuration may leave out.
+PORTFOLIO_DEFAULTS = {
+    'investment': 10000,
+    'min_weight': 0.0,
+    'max_weight': 1.0,
+    'risk_aversion': 'medium',
+    'risk_model': 'sample',
+    'benchmark': None,
+}
+
+
+def fetch_prices(tickers, start_date, end_date, api_key, price_cache=None, **polygon_options):
+    """Fetches daily closes for `tickers`, serving covered date ranges from `price_cache` when given."""
+    with instrumentation.timer('fetch'):
+        if price_cache is None:
+            return polygon_client.fetch_polygon_data(tickers, start_date, end_date, api_key, **polygon_options)
+        return price_cache.get_prices(tickers, start_date, end_date, fetch_ranges=lambda ranges: polygon_client.fetch_ranges(ranges, api_key, **polygon_options))
+
+
+def optimize(data, min_weight, max_weight, risk_aversion, risk_model='sample', n_factors=10, span=180, backtest=None, progress=None, result_cache=None):
+    """Estimates, solves and backtests the portfolio of `data`.
+
+    `backtest` holds the walk-forward keyword arguments, or is None to skip the backtest.
+    The risk model estimate is read from and stored in `result_cache` when given.
+    `progress` is called with (percent, stage) as each stage starts. Returns the weights,
+    performance, frontier and walk-forward returns.
+    """
+    progress = progress or (lambda update: None)
+    progress((30, 'Estimating returns and risk'))
+    with instrumentation.timer('estimate'):
+        mu = expected_returns.mean_historical_return(data)
+        S = cached_risk_model(data, risk_model, n_factors, span, result_cache)
+
+    progress((45, 'Solving'))
+    with instrumentation.timer('solve'):
+        ef, frontier = optimize_with_frontier(mu, S, min_weight, max_weight, risk_aversion)
+        weights, performance = ef.clean_weights(), ef.portfolio_performance(verbose=False)
+
+    backtest_returns = None
+    if backtest is not None:
+        with instrumentation.timer('backtest'):
+            backtest_returns = run_backtest(data, min_weight, max_weight, risk_aversion, risk_model=risk_model, n_factors=n_factors, span=span, **backtest)
+    return {'weights': weights, 'performance': performance, 'frontier': frontier, 'backtest_returns': backtest_returns}
+
+
+def cached_risk_model(data, risk_model, n_factors, span, result_cache=None):
+    """Estimates the risk model of `data`, reusing an estimate of the same universe, window and prices."""
+    if result_cache is None:
+        return estimate_risk_model(data, risk_model, n_factors=n_factors, span=span)
+    inputs = {'tickers': list(data.columns), 'start': data.index[0], 'end': data.index[-1], 'risk_model': [risk_model, n_factors, span]}
+    key = canonical_key(inputs, data)
+    S = result_cache.get_estimate(key)
+    instrumentation.record_cache('estimates', 'miss' if S is None else 'hit')
+    if S is None:
+        S = estimate_risk_model(data, risk_model, n_factors=n_factors, span=span)
+        result_cache.set_estimate(key, S)
+    return S
+
+
+def run_backtest(data, min_weight, max_weight, risk_aversion, window=252, rebalance='M', **kwargs):
+    """Runs the walk-forward backtest, or returns None when no rebalance date has a full window of history."""
+    if len(data) < 2 or not rebalance_positions(data.index[1:], rebalance, window):
+        return None
+    try:
+        backtest_returns, _ = walk_forward_backtest(data, min_weight, max_weight, risk_aversion, window=window, rebalance=rebalance, **kwargs)
+    except Exception as e:
+        logging.error(f"Walk-forward backtest failed: {str(e)}")
+        return None
+    return backtest_returns
+
+
+def discrete_allocation(cleaned_weights, latest_prices, investment):
+    """Returns the whole-share allocation of `investment` and the cash left over."""
+    with instrumentation.timer('allocation'):
+        da = DiscreteAllocation(cleaned_weights, latest_prices, total_portfolio_value=investment)
+        return da.greedy_portfolio()
+
+
+def performance_metrics(performance, analytics):
+    """Returns the summary metrics of a solved portfolio, in display order."""
+    expected_return, volatility, sharpe = performance
+    metrics = {
+        'Expected Annual Return': expected_return,
+        'Annual Volatility': volatility,
+        'Sharpe Ratio': sharpe,
+        'Total Return': analytics.portfolio_cumulative_returns.iloc[-1],
+    }
+    if analytics.backtest_returns is not None:
+        metrics['Walk-Forward Total Return'] = (1 + analytics.backtest_returns).prod() - 1
+    return metrics
+
+
+def load_portfolios(path):
+    """Reads portfolio configurations from a JSON list or a CSV file, one portfolio per row.
+
+    Each needs `tickers` (a list, or a comma-separated string), `start_date` and
+    `end_date`; other settings fall back to PORTFOLIO_DEFAULTS and `name` to its position.
+    """
+    if path.endswith('.csv'):
+        rows = pd.read_csv(path, dtype={'tickers': str}).to_dict('records')
+        rows = [{key: value for key, value in row.items() if not pd.isna(value)} for row in rows]
+    else:
+        with open(path) as f:
+            rows = json.load(f)
+    portfolios = []
+    for i, row in enumerate(rows):
+        portfolio = {**PORTFOLIO_DEFAULTS, 'name': f'portfolio-{i + 1}', **row}
+        if isinstance(portfolio['tickers'], str):
+            portfolio['tickers'] = portfolio['tickers'].split(',')
+        portfolio['tickers'] = [ticker.strip().upper() for ticker in portfolio['tickers']]
+        if portfolio['benchmark']:
+            portfolio['benchmark'] = portfolio['benchmark'].strip().upper()
+        portfolios.append(portfolio)
+    return portfolios
+
+
+def solve_portfolio(portfolio, data, benchmark_data, options):
+    """Optimizes one batch portfolio and returns its weights, allocation and metrics, or its error."""
+    try:
+        results = optimize(
+            data, portfolio['min_weight'], portfolio['max_weight'], portfolio['risk_aversion'],
+            risk_model=portfolio['risk_model'], **options,
+        )
+        analytics = PortfolioAnalytics(data, results['weights'], benchmark_data, portfolio['benchmark'], results['backtest_returns'])
+        allocation, leftover = discrete_allocation(results['weights'], analytics.latest_prices, portfolio['investment'])
+        metrics = performance_metrics(results['performance'], analytics)
+        if benchmark_data is not None:
+            metrics['Benchmark Total Return'] = (1 + analytics.combined_returns['Benchmark']).prod() - 1
+        metrics['Leftover Cash'] = leftover
+        return {'name': portfolio['name'], 'weights': results['weights'], 'allocation': allocation, 'metrics': metrics, 'error': None}
+    except Exception as e:
+        logging.error(f"Portfolio {portfolio['name']} failed: {str(e)}")
+        logging.error(traceback.format_exc())
+        return failed_result(portfolio, str(e))
+
+
+def failed_result(portfolio, error):
+    return {'name': portfolio['name'], 'weights': {}, 'allocation': {}, 'metrics': {}, 'error': error}
+
+
+def run_batch(portfolios, api_key, price_cache=None, polygon_options=None, optimize_options=None, max_workers=None):
+    """Optimizes every portfolio, fetching the union of their tickers and dates once.
+
+    Solves are spread over `max_workers` processes. Returns the per-portfolio results
+    and the throughput in portfolios per second.
+    """
+    start = time.perf_counter()
+    tickers = sorted({ticker for portfolio in portfolios for ticker in portfolio['tickers']} | {portfolio['benchmark'] for portfolio in portfolios if portfolio['benchmark']})
+    start_date = min(portfolio['start_date'] for portfolio in portfolios)
+    end_date = max(portfolio['end_date'] for portfolio in portfolios)
+    try:
+        prices = fetch_prices(tickers, start_date, end_date, api_key, price_cache=price_cache, **(polygon_options or {}))
+    except ValueError as e:
+        # Raised when no ticker returned any bars, which fails every portfolio alike.
+        logging.error(f"Price fetch for the batch failed: {str(e)}")
+        results = [failed_result(portfolio, f"Price fetch failed: {str(e)}") for portfolio in portfolios]
+        return results, len(portfolios) / (time.perf_counter() - start)
+    logging.info(f"Fetched {len(tickers)} tickers for {len(portfolios)} portfolios in {time.perf_counter() - start:.2f}s")
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending = []
+        for portfolio in portfolios:
+            # Tickers whose fetch failed or returned no bars are missing from the price matrix.
+            missing = [ticker for ticker in portfolio['tickers'] + [portfolio['benchmark']] if ticker and ticker not in prices.columns]
+            if missing:
+                logging.error(f"Portfolio {portfolio['name']} failed: no price data for {', '.join(missing)}")
+                pending.append(failed_result(portfolio, f"No price data for {', '.join(missing)}"))
+                continue
+            window = prices.loc[portfolio['start_date']:portfolio['end_date']]
+            data = window[portfolio['tickers']].dropna(how='all')
+            benchmark_data = window[[portfolio['benchmark']]].dropna(how='all') if portfolio['benchmark'] else None
+            pending.append(pool.submit(solve_portfolio, portfolio, data, benchmark_data, optimize_options or {}))
+        results = [item if isinstance(item, dict) else item.result() for item in pending]
+
+    throughput = len(portfolios) / (time.perf_counter() - start)
+    logging.info(f"Optimized {len(portfolios)} portfolios at {throughput:.2f} portfolios/s")
+    return results, throughput
+
+
+def results_tables(results):
+    """Flattens batch results into weights, allocations and performance tables."""
+    weights = pd.DataFrame(
+        [(result['name'], ticker, weight) for result in results for ticker, weight in result['weights'].items()],
+        columns=['Portfolio', 'Ticker', 'Weight'],
+    )
+    allocations = pd.DataFrame(
+        [(result['name'], ticker, shares) for result in results for ticker, shares in result['allocation'].items()],
+        columns=['Portfolio', 'Ticker', 'Shares'],
+    )
+    performance = pd.DataFrame([result['metrics'] for result in results])
+    performance.insert(0, 'Portfolio', [result['name'] for result in results])
+    performance['Error'] = [result['error'] for result in results]
+    return {'weights': weights, 'allocations': allocations, 'performance': performance}
+
+
+def write_results(results, output_dir, file_format=None):
+    """Writes the batch tables to `output_dir` as Parquet when a Parquet engine is installed, else CSV.
+
+    Returns the written paths.
+    """
+    if file_format is None:
+        file_format = 'parquet' if find_spec('pyarrow') or find_spec('fastparquet') else 'csv'
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for table_name, table in results_tables(results).items():
+        path = os.path.join(output_dir, f'{table_name}.{file_format}')
+        if file_format == 'parquet':
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+        paths.append(path)
+    return paths
@@ -0,0 +1,102 @@
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+from cvxpy.atoms.quad_form import QuadForm
+from pypfopt import EfficientFrontier
+
+import instrumentation
+from risk_estimators import FactorCovariance
+
+# Risk-aversion coefficients behind the dashboard's risk profiles; 'medium' is the max-Sharpe portfolio.
+RISK_AVERSION_LEVELS = {'low': 0.1, 'high': 10}
+PERFORMANCE_COLUMNS = ['Expected Annual Return', 'Annual Volatility', 'Sharpe Ratio']
+DEFAULT_RISK_AVERSIONS = np.unique(np.concatenate([np.logspace(-2, 2, 25), list(RISK_AVERSION_LEVELS.values())]))
+
+
+def warm_start_solver():
+    """Returns a solver that can warm-start a re-solved QP, or None to let cvxpy choose."""
+    return 'OSQP' if 'OSQP' in cp.installed_solvers() else None
+
+
+class FactorEfficientFrontier(EfficientFrontier):
+    """EfficientFrontier that keeps a factor model's covariance in low-rank form inside the solver.
+
+    Portfolio variance is written as ||(B F^1/2)' w||^2 + ||D^1/2 w||^2, which gives the
+    solver O(N k) nonzeros instead of the N^2 of a dense quadratic form. Every
+    EfficientFrontier method builds its problem with w'Sw quadratic forms as usual; they
+    are swapped for the low-rank expression when the problem is first compiled. The
+    dense covariance is still kept for `portfolio_performance`.
+    """
+
+    def __init__(self, expected_returns, factor_covariance, **kwargs):
+        super().__init__(expected_returns, factor_covariance.to_dense(), **kwargs)
+        self._factor_root = factor_covariance.factor_root
+        self._specific_root = np.sqrt(factor_covariance.specific_variances)
+
+    def _variance(self, w):
+        return cp.sum_squares(self._factor_root.T @ w) + cp.sum_squares(cp.multiply(self._specific_root, w))
+
+    def _low_rank(self, expr):
+        """Rebuilds `expr` with every quadratic form in the weights replaced by `_variance`."""
+        if isinstance(expr, QuadForm) and expr.args[0] is self._w:
+            return self._variance(self._w)
+        if not expr.args:
+            return expr
+        return expr.copy([self._low_rank(arg) for arg in expr.args])
+
+    def _solve_cvxpy_opt_problem(self):
+        if self._opt is None:
+            self._objective = self._low_rank(self._objective)
+            self._constraints = [self._low_rank(constraint) for constraint in self._constraints]
+        return super()._solve_cvxpy_opt_problem()
+
+
+def make_frontier(mu, S, min_weight, max_weight, **kwargs):
+    """Creates an EfficientFrontier with the dashboard's per-asset weight bounds.
+
+    `S` is a covariance DataFrame, or a FactorCovariance to solve in low-rank form.
+    """
+    if isinstance(S, FactorCovariance):
+        ef = FactorEfficientFrontier(mu, S, **kwargs)
+    else:
+        ef = EfficientFrontier(mu, S, **kwargs)
+    ef.add_constraint(lambda x: x >= min_weight)
+    ef.add_constraint(lambda x: x <= max_weight)
+    return ef
+
+
+def sweep_frontier(mu, S, min_weight, max_weight, risk_aversions=DEFAULT_RISK_AVERSIONS, risk_free_rate=0.0):
+    """Solves the max-quadratic-utility portfolio for every risk aversion in `risk_aversions`.
+
+    The problem is compiled once and only its risk-aversion parameter changes between
+    solves, so each point warm-starts from the previous solution. Returns the sweep's
+    EfficientFrontier and a DataFrame indexed by risk aversion with the expected return,
+    volatility and Sharpe ratio of each point followed by its weights.
+    """
+    risk_aversions = sorted(risk_aversions)
+    ef = make_frontier(mu, S, min_weight, max_weight, solver=warm_start_solver())
+    rows = []
+    for risk_aversion in risk_aversions:
+        ef.max_quadratic_utility(risk_aversion=risk_aversion)
+        instrumentation.record_solve(ef, 'frontier')
+        performance = ef.portfolio_performance(verbose=False, risk_free_rate=risk_free_rate)
+        rows.append([*performance, *ef.weights])
+    columns = [*PERFORMANCE_COLUMNS, *ef.tickers]
+    frontier = pd.DataFrame(rows, index=pd.Index(risk_aversions, name='Risk Aversion'), columns=columns)
+    return ef, frontier
+
+
+def optimize_with_frontier(mu, S, min_weight, max_weight, risk_aversion):
+    """Sweeps the frontier and returns (ef, frontier) with `ef` holding the chosen risk profile.
+
+    'low' and 'high' pick their point straight from the sweep; any other profile solves
+    the max-Sharpe portfolio, which is not a quadratic-utility point.
+    """
+    ef, frontier = sweep_frontier(mu, S, min_weight, max_weight)
+    if risk_aversion in RISK_AVERSION_LEVELS:
+        ef.set_weights(frontier.loc[RISK_AVERSION_LEVELS[risk_aversion], ef.tickers].to_dict())
+    else:
+        ef = make_frontier(mu, S, min_weight, max_weight)
+        ef.max_sharpe()
+        instrumentation.record_solve(ef, 'max_sharpe')
+    return ef, frontier
@@ -0,0 +1,171 @@
+import cProfile
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import diskcache
+
+logger = logging.getLogger('instrumentation')
+
+# Upper bounds in seconds of the stage duration histogram buckets.
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, math.inf)
+
+# Every exported metric, with its Prometheus type and help text.
+METRICS = {
+    'portfolioopt_stage_seconds': ('histogram', 'Duration of each optimization stage.'),
+    'portfolioopt_fetched_bytes_total': ('counter', 'Response bytes fetched from Polygon per ticker.'),
+    'portfolioopt_fetched_rows_total': ('counter', 'Daily bars fetched from Polygon per ticker.'),
+    'portfolioopt_cache_requests_total': ('counter', 'Cache lookups by cache and result (hit, partial or miss).'),
+    'portfolioopt_solver_solves_total': ('counter', 'Optimization problems solved, by problem.'),
+    'portfolioopt_solver_iterations_total': ('counter', 'Solver iterations, by problem.'),
+}
+
+
+class MemoryStore:
+    """Metric values of the current process."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def increment(self, deltas):
+        with self._lock:
+            for key, delta in deltas:
+                self._values[key] = self._values.get(key, 0) + delta
+
+    def items(self):
+        with self._lock:
+            return list(self._values.items())
+
+
+class DiskStore:
+    """Metric values kept in a diskcache directory, so every server and job process adds to the same totals."""
+
+    def __init__(self, path):
+        self._cache = diskcache.Cache(path)
+
+    def increment(self, deltas):
+        with self._cache.transact():
+            for key, delta in deltas:
+                self._cache.incr(key, delta)
+
+    def items(self):
+        return [(key, self._cache.get(key, 0)) for key in self._cache.iterkeys()]
+
+
+_store = MemoryStore()
+
+
+def configure(path):
+    """Shares metrics through the diskcache directory at `path`; an empty path keeps them in this process."""
+    global _store
+    _store = DiskStore(path) if path else MemoryStore()
+
+
+def _key(name, labels):
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Adds `value` to the counter `name` with `labels`."""
+    _store.increment([(_key(name, labels), value)])
+
+
+def observe(name, value, buckets=STAGE_BUCKETS, **labels):
+    """Records `value` in the histogram `name` with `labels`."""
+    deltas = [(_key(f'{name}_bucket', dict(labels, le=bound)), 1) for bound in buckets if value <= bound]
+    deltas += [(_key(f'{name}_sum', labels), value), (_key(f'{name}_count', labels), 1)]
+    _store.increment(deltas)
+
+
+def log_event(event, **fields):
+    """Emits a structured (JSON) log record."""
+    logger.info(json.dumps({'event': event, **fields}, default=str))
+
+
+@contextmanager
+def timer(stage):
+    """Times the enclosed block as `stage`, in the stage histogram and as a log record."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe('portfolioopt_stage_seconds', seconds, stage=stage)
+        log_event('stage', stage=stage, seconds=round(seconds, 6))
+
+
+def record_fetch(ticker, nbytes, rows):
+    """Counts the bytes and rows fetched for `ticker`."""
+    inc('portfolioopt_fetched_bytes_total', nbytes, ticker=ticker)
+    inc('portfolioopt_fetched_rows_total', rows, ticker=ticker)
+    log_event('fetch', ticker=ticker, bytes=nbytes, rows=rows)
+
+
+def record_cache(cache, result):
+    """Counts a lookup in `cache` that was a 'hit', 'partial' or 'miss'."""
+    inc('portfolioopt_cache_requests_total', cache=cache, result=result)
+
+
+def record_solve(ef, problem):
+    """Counts a solve of the EfficientFrontier `ef` and its solver iterations, when the solver reports them."""
+    inc('portfolioopt_solver_solves_total', problem=problem)
+    stats = ef._opt.solver_stats if ef._opt is not None else None
+    if stats is not None and stats.num_iters is not None:
+        inc('portfolioopt_solver_iterations_total', stats.num_iters, problem=problem)
+
+
+def _format_value(value):
+    return '+Inf' if value == math.inf else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """Returns every metric in the Prometheus text exposition format."""
+    series = {}
+    for (name, labels), value in _store.items():
+        family = next((metric for metric in METRICS if name == metric or name.startswith(f'{metric}_')), name)
+        series.setdefault(family, []).append((name, labels, value))
+    lines = []
+    for family in sorted(series):
+        metric_type, help_text = METRICS.get(family, ('untyped', ''))
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {metric_type}')
+        for name, labels, value in sorted(series[family], key=lambda item: (item[0], _bucket_order(item[1]))):
+            label_text = ','.join(f'{label}="{_format_label(label, label_value)}"' for label, label_value in labels)
+            lines.append(f'{name}{{{label_text}}} {_format_value(value)}' if label_text else f'{name} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _bucket_order(labels):
+    """Sorts histogram buckets numerically by their upper bound, after their other labels."""
+    other = tuple((label, value) for label, value in labels if label != 'le')
+    bound = next((float(value) for label, value in labels if label == 'le'), 0.0)
+    return other, bound
+
+
+def _format_label(label, value):
+    if label == 'le':
+        return '+Inf' if float(value) == math.inf else value
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+@contextmanager
+def profiled(enabled, directory):
+    """Profiles the enclosed block with cProfile when `enabled`, dumping the stats into `directory`."""
+    if not enabled:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}.prof')
+        profiler.dump_stats(path)
+        log_event('profile', path=path)
@@ -2,14 +2,34 @@ import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 import pandas as pd
-from pypfopt import expected_returns, risk_models, EfficientFrontier, DiscreteAllocation
 import logging
 import traceback
-import requests
+import json
+from urllib.parse import parse_qs
+import flask
 import plotly
 from plotly.subplots import make_subplots 
 from components import create_sidebar, create_main_content
-from config import app, API_KEY
+from config import app
+from settings import API_KEY, POLYGON_BASE_URL, POLYGON_MAX_WORKERS, POLYGON_MAX_RETRIES, POLYGON_BACKOFF
+from settings import PRICE_CACHE_PATH, PRICE_CACHE_MAX_AGE_DAYS, PRICE_CACHE_MAX_TICKERS
+from settings import BACKTEST_WINDOW, BACKTEST_REBALANCE, BACKTEST_EXPANDING, BACKTEST_COST_BPS, BACKTEST_WORKERS
+from settings import RESULT_CACHE_PATH, RESULT_CACHE_TTL, RESULT_CACHE_SIZE_MB
+from settings import FIGURE_POINT_BUDGET, WEBGL_POINT_THRESHOLD
+from settings import RISK_FACTORS, RISK_EWMA_SPAN
+from settings import METRICS_PATH, PROFILE_PATH
+from price_cache import PriceCache
+from analytics import PortfolioAnalytics
+from frontier import PERFORMANCE_COLUMNS
+import engine
+import instrumentation
+from result_cache import ResultCache, canonical_key
+from downsample import bar_trace, line_trace, payload_sizes, thin_ticks
+
+price_cache = PriceCache(PRICE_CACHE_PATH, max_age_days=PRICE_CACHE_MAX_AGE_DAYS, max_tickers=PRICE_CACHE_MAX_TICKERS) if PRICE_CACHE_PATH else None
+result_cache = ResultCache(RESULT_CACHE_PATH, ttl=RESULT_CACHE_TTL, size_limit=RESULT_CACHE_SIZE_MB * 2**20) if RESULT_CACHE_PATH else None
+instrumentation.configure(METRICS_PATH)
+
 
 def create_layout():
     return dbc.Container([
@@ -20,17 +40,21 @@ def create_layout():
     ], fluid=True, style={'background-color': '#282c34', 'color': 'white', 'font-family': 'Roboto, sans-serif'})
 
 
+# Figure outputs filled from the results store, in the order the store lists them.
+RESULT_FIGURES = [
+    'pie-chart',
+    'performance-chart',
+    'weight-allocation',
+    'cumulative-return',
+    'portfolio-growth',
+    'monthly-returns',
+    'annual-returns',
+    'efficient-frontier',
+]
+
+
 @app.callback(
-    [
-        Output('pie-chart', 'figure'),
-        Output('performance-chart', 'figure'),
-        Output('weight-allocation', 'figure'),
-        Output('cumulative-return', 'figure'),
-        Output('portfolio-growth', 'figure'),
-        Output('performance-table', 'data'),
-        Output('monthly-returns', 'figure'),
-        Output('annual-returns', 'figure'),
-    ],
+    Output('results-store', 'data'),
     [
         Input('submit-button', 'n_clicks')
     ],
@@ -42,162 +66,196 @@ def create_layout():
         State('min_weight', 'value'),
         State('max_weight', 'value'),
         State('risk_aversion', 'value'),
-        State('benchmark', 'value')
+        State('risk_model', 'value'),
+        State('benchmark', 'value'),
+        State('url', 'search')
     ],
+    background=True,
+    progress=[Output('optimize-progress', 'value'), Output('optimize-progress', 'label')],
+    progress_default=[0, ''],
+    running=[(Output('cancel-button', 'disabled'), False, True)],
+    cancel=[Input('cancel-button', 'n_clicks')],
     prevent_initial_call=True
 )
-def update_output(n_clicks, stocks, start_date, end_date, investment, min_weight, max_weight, risk_aversion, benchmark):
-    """Updates all graphs and tables based on user input."""
+def update_output(set_progress, n_clicks, stocks, start_date, end_date, investment, min_weight, max_weight, risk_aversion, risk_model, benchmark, search):
+    """Runs the optimization as a background job and stores the serialized figures and table.
+
+    Resubmitting while a job runs cancels the previous job. With `?profile=1` in the page
+    URL the run is profiled with cProfile and the stats are dumped under PROFILE_PATH.
+    """
     if n_clicks > 0:
         try:
-            tickers = [stock.strip().upper() for stock in stocks.split(',')]
-            data = fetch_polygon_data(tickers, start_date, end_date)
-            
-            data.index = pd.to_datetime(data.index)
-
-            benchmark_data = fetch_polygon_data([benchmark], start_date, end_date)
-            benchmark_data.index = pd.to_datetime(benchmark_data.index)
-            benchmark_data = fetch_polygon_data([benchmark], start_date, end_date)
-            print("Benchmark Data:", benchmark_data)  # DEBUG
-
-
-            benchmark_returns = benchmark_data.pct_change().dropna()
-            cumulative_benchmark_returns = (1 + benchmark_returns).cumprod() - 1
-
-            mu = expected_returns.mean_historical_return(data)
-            S = risk_models.sample_cov(data)
-            ef = EfficientFrontier(mu, S)
-            ef.add_constraint(lambda x: x >= min_weight)
-            ef.add_constraint(lambda x: x <= max_weight)
-
-            if risk_aversion == 'low':
-                weights = ef.max_quadratic_utility(risk_aversion=0.1)
-            elif risk_aversion == 'high':
-                weights = ef.max_quadratic_utility(risk_aversion=10)
-            else:
-                weights = ef.max_sharpe()
-
-            cleaned_weights = ef.clean_weights()
-
-            pie_chart = create_pie_chart(cleaned_weights)
-            performance_chart = create_performance_chart(ef)
-            weight_allocation_chart = create_weight_allocation_chart(data, cleaned_weights, investment)
-            cumulative_return_chart = create_cumulative_return_chart(data, tickers)
-            portfolio_growth_chart = create_portfolio_growth_chart(data, cleaned_weights, cumulative_benchmark_returns, benchmark)
-            performance_table_data = create_performance_table_data(ef, data, cleaned_weights)
-            monthly_returns_chart = create_monthly_returns_chart(data, cleaned_weights)
-            annual_returns_chart = create_annual_returns_chart(data, cleaned_weights)
-
-            return [pie_chart, performance_chart, weight_allocation_chart, cumulative_return_chart, portfolio_growth_chart, performance_table_data, monthly_returns_chart, annual_returns_chart]
-
+            profile = bool(PROFILE_PATH) and parse_qs((search or '').lstrip('?')).get('profile') == ['1']
+            with instrumentation.profiled(profile, PROFILE_PATH), instrumentation.timer('total'):
+                return run_optimization(set_progress, stocks, start_date, end_date, investment, min_weight, max_weight, risk_aversion, risk_model, benchmark)
         except Exception as e:
             logging.error(f"Exception in processing portfolio optimization: {str(e)}")
             logging.error(traceback.format_exc())
-            return [go.Figure(), go.Figure(), go.Figure(), go.Figure(), go.Figure(), [], go.Figure(), go.Figure()]
-    return [go.Figure(), go.Figure(), go.Figure(), go.Figure(), go.Figure(), [], go.Figure(), go.Figure()]
-    
+            return serialize_results({}, [])
+    return serialize_results({}, [])
+
+
+def run_optimization(set_progress, stocks, start_date, end_date, investment, min_weight, max_weight, risk_aversion, risk_model, benchmark):
+    """Fetches, optimizes and renders one dashboard request, serving memoized results where possible."""
+    set_progress((10, 'Fetching prices'))
+    tickers = [stock.strip().upper() for stock in stocks.split(',')]
+    combined_data = fetch_polygon_data(tickers + [benchmark], start_date, end_date)
+    data = combined_data[tickers].dropna(how='all')
+    benchmark_data = combined_data[[benchmark]].dropna(how='all')
+
+    inputs = {
+        'tickers': tickers, 'start_date': start_date, 'end_date': end_date,
+        'min_weight': min_weight, 'max_weight': max_weight, 'risk_aversion': risk_aversion,
+        'risk_model': [risk_model, RISK_FACTORS, RISK_EWMA_SPAN],
+        'backtest': [BACKTEST_WINDOW, BACKTEST_REBALANCE, BACKTEST_EXPANDING, BACKTEST_COST_BPS],
+    }
+    figures_key = canonical_key(dict(inputs, investment=investment, benchmark=benchmark), combined_data)
+    payload = cache_lookup('figures', figures_key)
+    if payload is not None:
+        return payload
+
+    results_key = canonical_key(inputs, data)
+    results = cache_lookup('results', results_key)
+    if results is None:
+        results = engine.optimize(
+            data, min_weight, max_weight, risk_aversion, risk_model=risk_model, n_factors=RISK_FACTORS, span=RISK_EWMA_SPAN,
+            backtest=backtest_options(), progress=set_progress, result_cache=result_cache,
+        )
+        if result_cache is not None:
+            result_cache.set_results(results_key, results)
+
+    set_progress((75, 'Rendering'))
+    with instrumentation.timer('render'):
+        cleaned_weights, performance, frontier = results['weights'], results['performance'], results['frontier']
+        analytics = PortfolioAnalytics(data, cleaned_weights, benchmark_data, benchmark, results['backtest_returns'])
+        figures = {
+            'pie-chart': create_pie_chart(cleaned_weights),
+            'performance-chart': create_performance_chart(performance),
+            'weight-allocation': create_weight_allocation_chart(analytics, investment),
+            'cumulative-return': create_cumulative_return_chart(analytics),
+            'portfolio-growth': create_portfolio_growth_chart(analytics),
+            'monthly-returns': create_monthly_returns_chart(analytics),
+            'annual-returns': create_annual_returns_chart(analytics),
+            'efficient-frontier': create_efficient_frontier_chart(frontier, performance),
+        }
+        performance_table_data = create_performance_table_data(performance, analytics)
+
+    payload = serialize_results(figures, performance_table_data)
+    if result_cache is not None:
+        result_cache.set_figures(figures_key, payload)
+    return payload
+
+
+def cache_lookup(level, key):
+    """Looks `key` up in one level of the result cache, counting the hit or miss; None when disabled or missing."""
+    if result_cache is None:
+        return None
+    value = result_cache.get_figures(key) if level == 'figures' else result_cache.get_results(key)
+    instrumentation.record_cache(level, 'miss' if value is None else 'hit')
+    return value
+
+
+def serialize_results(figures, performance_table_data):
+    """Packs figures (as plotly JSON, empty where missing) and the table rows for the results store."""
+    with instrumentation.timer('serialize'):
+        serialized = {figure_id: figures.get(figure_id, go.Figure()).to_json() for figure_id in RESULT_FIGURES}
+    instrumentation.log_event('payload', bytes=payload_sizes(serialized))
+    return {'figures': serialized, 'table': performance_table_data}
+
+
+# Decoding the stored figure JSON in the browser keeps the server out of the render path.
+app.clientside_callback(
+    """
+    function(results) {
+        const ids = %s;
+        if (!results) {
+            return Array(ids.length + 1).fill(window.dash_clientside.no_update);
+        }
+        return ids.map(id => JSON.parse(results.figures[id])).concat([results.table]);
+    }
+    """ % json.dumps(RESULT_FIGURES),
+    [Output(figure_id, 'figure') for figure_id in RESULT_FIGURES] + [Output('performance-table', 'data')],
+    Input('results-store', 'data'),
+    prevent_initial_call=True
+)
+
+
+@app.server.route('/metrics')
+def metrics():
+    """Serves the instrumentation metrics in the Prometheus text format."""
+    return flask.Response(instrumentation.render(), mimetype='text/plain; version=0.0.4')
+
 
 def fetch_polygon_data(tickers, start_date, end_date):
-    base_url = "https://api.polygon.io/v2/aggs/ticker"
-    headers = {'Authorization': f'Bearer {API_KEY}'}
-    all_data = {}
-    
-    for ticker in tickers:
-        full_url = f"{base_url}/{ticker}/range/1/day/{start_date}/{end_date}"
-        response = requests.get(full_url, headers=headers)
-        if response.status_code == 200:
-            try:
-                results = response.json()['results']
-                dates = [result['t'] for result in results] 
-                prices = [result['c'] for result in results]  
-                df = pd.DataFrame(data=prices, index=pd.to_datetime(dates, unit='ms'), columns=[ticker])
-                all_data[ticker] = df
-            except KeyError:
-                logging.error(f"No data found for {ticker}")
-        else:
-            logging.error(f"Failed to fetch data for {ticker}: {response.text}")
-    
-    combined_data = pd.concat(all_data.values(), axis=1)
-    combined_data.index = pd.to_datetime(combined_data.index)
-    return combined_data
+    """Fetches daily closes for `tickers`, serving covered date ranges from the local price cache."""
+    return engine.fetch_prices(tickers, start_date, end_date, API_KEY, price_cache=price_cache, **polygon_options())
+
+
+def backtest_options():
+    """Returns the configured walk-forward backtest settings."""
+    return {
+        'window': BACKTEST_WINDOW,
+        'rebalance': BACKTEST_REBALANCE,
+        'expanding': BACKTEST_EXPANDING,
+        'cost_bps': BACKTEST_COST_BPS,
+        'max_workers': BACKTEST_WORKERS,
+    }
+
+
+def polygon_options():
+    """Returns the configured Polygon client settings."""
+    return {
+        'base_url': POLYGON_BASE_URL,
+        'max_workers': POLYGON_MAX_WORKERS,
+        'max_retries': POLYGON_MAX_RETRIES,
+        'backoff_factor': POLYGON_BACKOFF,
+    }
 
 
 def create_pie_chart(cleaned_weights):
     """Creates the portfolio weights pie chart."""
     return go.Figure(data=[go.Pie(labels=list(cleaned_weights.keys()), values=list(cleaned_weights.values()), title="Portfolio Weights", marker=dict(colors=plotly.colors.qualitative.Plotly))]).update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
 
-def create_performance_chart(ef):
+def create_performance_chart(performance_data):
     """Creates the portfolio performance bar chart."""
-    performance_data = ef.portfolio_performance(verbose=False)
     return go.Figure(data=[go.Bar(x=['Expected Annual Return', 'Annual Volatility', 'Sharpe Ratio'], y=list(performance_data), marker=dict(color=['#007bff', '#28a745', '#dc3545']))]).update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
 
-def create_weight_allocation_chart(data, cleaned_weights, investment):
+def create_weight_allocation_chart(analytics, investment):
     """Creates the discrete allocation bar chart."""
-    latest_prices = data.iloc[-1]
-    da = DiscreteAllocation(cleaned_weights, latest_prices, total_portfolio_value=investment)
-    allocation, leftover = da.greedy_portfolio()
+    allocation, leftover = engine.discrete_allocation(analytics.cleaned_weights, analytics.latest_prices, investment)
     return go.Figure(data=[go.Bar(x=list(allocation.keys()), y=list(allocation.values()), name='Shares', marker=dict(color='#ffc107'))]).update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
 
-def create_cumulative_return_chart(data):
-    """Creates the cumulative returns chart."""
-    data.index = pd.to_datetime(data.index)
-    cumulative_returns = (1 + data.pct_change()).cumprod() - 1
-    
-    fig = go.Figure()
-    for ticker in data.columns:
-        fig.add_trace(go.Scatter(x=cumulative_returns.index, y=cumulative_returns[ticker], mode='lines', name=ticker))
-    
-    fig.update_layout(
-        plot_bgcolor='#282c34',
-        paper_bgcolor='#282c34',
-        font_color='white',
-        font_family='Roboto, sans-serif',
-        title="Cumulative Returns"
-    )
-    return fig
-
-def create_cumulative_return_chart(data, tickers):
+def create_cumulative_return_chart(analytics):
     """Creates the cumulative returns line chart."""
-    cumulative_returns = (1 + data.pct_change()).cumprod() - 1
+    cumulative_returns = analytics.cumulative_returns
+    webgl = cumulative_returns.size > WEBGL_POINT_THRESHOLD
     fig = go.Figure()
-    for ticker in tickers:
-        fig.add_trace(go.Scatter(x=cumulative_returns.index, y=cumulative_returns[ticker], mode='lines', name=ticker))
-    return fig.update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
-
+    for ticker in cumulative_returns.columns:
+        fig.add_trace(line_trace(cumulative_returns[ticker], name=ticker, max_points=FIGURE_POINT_BUDGET, webgl=webgl))
+    return fig.update_xaxes(type='date').update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
 
-def create_portfolio_growth_chart(data, cleaned_weights, benchmark_data, benchmark_name):
-    """Creates the portfolio growth chart with two subplots, resampling data within each subplot."""
-    portfolio_returns = data.pct_change().dot(pd.Series(cleaned_weights))
-    benchmark_returns = benchmark_data[benchmark_name].pct_change()
 
-    
-    combined_returns = pd.concat([portfolio_returns, benchmark_returns], axis=1)
-    combined_returns.columns = ['Portfolio', 'Benchmark']
-    combined_returns = combined_returns.dropna()  
+def create_portfolio_growth_chart(analytics):
+    """Creates the portfolio growth chart with two subplots of compounded monthly growth."""
+    benchmark_name = analytics.benchmark_name
+    monthly_returns = analytics.combined_monthly_returns
 
-    
-    start_date = max(combined_returns.index.min(), combined_returns.index.min()) 
-    end_date = min(combined_returns.index.max(), combined_returns.index.max())  
-
-
-    combined_returns = combined_returns[(combined_returns.index >= start_date) & (combined_returns.index <= end_date)]
-
-    monthly_returns = combined_returns.resample('M').last()
-
-    
     portfolio_cumulative = (1 + monthly_returns['Portfolio']).cumprod() - 1
     benchmark_cumulative = (1 + monthly_returns['Benchmark']).cumprod() - 1
 
-   
-    tick_dates = pd.date_range(start=portfolio_cumulative.index.min(), end=portfolio_cumulative.index.max(), freq='MS')
+    tick_dates = thin_ticks(pd.date_range(start=portfolio_cumulative.index.min(), end=portfolio_cumulative.index.max(), freq='MS'))
 
    
     fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.05)
 
-    fig.add_trace(go.Scatter(x=portfolio_cumulative.index, y=portfolio_cumulative, mode='lines', name='Portfolio'), row=1, col=1)
+    fig.add_trace(line_trace(portfolio_cumulative, name='Portfolio', max_points=FIGURE_POINT_BUDGET), row=1, col=1)
+    if analytics.backtest_returns is not None:
+        backtest_cumulative = (1 + analytics.backtest_monthly_returns).cumprod() - 1
+        fig.add_trace(line_trace(backtest_cumulative, name='Walk-Forward', max_points=FIGURE_POINT_BUDGET), row=1, col=1)
     fig.update_yaxes(title_text='Portfolio Cumulative Returns', row=1, col=1)
 
-    fig.add_trace(go.Scatter(x=benchmark_cumulative.index, y=benchmark_cumulative, mode='lines', name=benchmark_name), row=2, col=1)
+    fig.add_trace(line_trace(benchmark_cumulative, name=benchmark_name, max_points=FIGURE_POINT_BUDGET), row=2, col=1)
+    fig.update_xaxes(type='date')
     fig.update_yaxes(title_text='Benchmark Cumulative Returns', row=2, col=1)
 
     fig.update_layout(
@@ -212,27 +270,33 @@ def create_portfolio_growth_chart(data, cleaned_weights, benchmark_data, benchma
     )
     return fig
 
-def create_performance_table_data(ef, data, cleaned_weights):
+def create_performance_table_data(performance_data, analytics):
     """Creates the performance summary table data."""
-    performance_data = ef.portfolio_performance(verbose=False)
-    portfolio_returns = data.pct_change().dropna()
-    weighted_returns = (portfolio_returns * pd.Series(cleaned_weights)).sum(axis=1)
-    portfolio_cumulative_returns = (1 + weighted_returns).cumprod() - 1
-
-    return [
-        {'Metric': 'Expected Annual Return', 'Value': f'{performance_data[0]:.2%}'},
-        {'Metric': 'Annual Volatility', 'Value': f'{performance_data[1]:.2%}'},
-        {'Metric': 'Sharpe Ratio', 'Value': f'{performance_data[2]:2f}'},
-        {'Metric': 'Total Return', 'Value': f'{portfolio_cumulative_returns.iloc[-1]:.2%}'}
-    ]
-
-def create_monthly_returns_chart(data, cleaned_weights):
+    metrics = engine.performance_metrics(performance_data, analytics)
+    formats = {'Sharpe Ratio': '{:2f}'}
+    return [{'Metric': metric, 'Value': formats.get(metric, '{:.2%}').format(value)} for metric, value in metrics.items()]
+
+def create_monthly_returns_chart(analytics):
     """Creates the monthly returns bar chart."""
-    portfolio_returns = (data.pct_change().dot(pd.Series(cleaned_weights))).resample('M').apply(lambda x: (1 + x).prod() - 1)
-    return go.Figure(data=[go.Bar(x=portfolio_returns.index, y=portfolio_returns, name='Monthly Returns', marker=dict(color='#17BECF'))]).update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
+    portfolio_returns = analytics.monthly_returns
+    return go.Figure(data=[bar_trace(portfolio_returns, name='Monthly Returns', marker=dict(color='#17BECF'))]).update_xaxes(type='date').update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
 
-def create_annual_returns_chart(data, cleaned_weights):
+def create_annual_returns_chart(analytics):
     """Creates the annual returns bar chart."""
-    portfolio_returns = (data.pct_change().dot(pd.Series(cleaned_weights))).resample('A').apply(lambda x: (1 + x).prod() - 1)
-    return go.Figure(data=[go.Bar(x=portfolio_returns.index, y=portfolio_returns, name='Annual Returns', marker=dict(color='#1F77B4'))]).update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
-
+    portfolio_returns = analytics.annual_returns
+    return go.Figure(data=[bar_trace(portfolio_returns, name='Annual Returns', marker=dict(color='#1F77B4'))]).update_xaxes(type='date').update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif')
+
+def create_efficient_frontier_chart(frontier, performance_data):
+    """Creates the efficient frontier chart; hovering a point shows its weights."""
+    tickers = [column for column in frontier.columns if column not in PERFORMANCE_COLUMNS]
+    hover = '<br>'.join(f'{ticker}: %{{customdata[{i}]:.1%}}' for i, ticker in enumerate(tickers))
+    chosen_return, chosen_volatility, _ = performance_data
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=frontier['Annual Volatility'], y=frontier['Expected Annual Return'], mode='lines+markers', name='Frontier',
+        customdata=frontier[tickers].to_numpy(), text=[f'Risk aversion {value:g}' for value in frontier.index],
+        hovertemplate='%{text}<br>Return %{y:.2%}, volatility %{x:.2%}<br>' + hover + '<extra></extra>',
+        marker=dict(color='#17BECF'),
+    ))
+    fig.add_trace(go.Scatter(x=[chosen_volatility], y=[chosen_return], mode='markers', name='Selected Portfolio', marker=dict(color='#dc3545', size=12)))
+    return fig.update_layout(plot_bgcolor='#282c34', paper_bgcolor='#282c34', font_color='white', font_family='Roboto, sans-serif', xaxis_title='Annual Volatility', yaxis_title='Expected Annual Return', xaxis_tickformat='.0%', yaxis_tickformat='.0%')
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+# Period aliases understood by DatetimeIndex.to_period, keyed by the names callers use.
+PERIOD_ALIASES = {'W': 'W', 'M': 'M', 'Q': 'Q', 'A': 'Y', 'Y': 'Y'}
+
+
+def compound_returns(returns, freq='M'):
+    """Compounds daily simple returns into weekly, monthly, quarterly or annual returns.
+
+    Works on a Series or on every column of a DataFrame at once: log growth is summed
+    cumulatively and differenced at the last row of each period, so no Python code runs
+    per period. NaN returns count as zero, like `(1 + x).prod() - 1` does. The result is
+    labelled with each period's end date, as `resample` would label it. `returns` must
+    be sorted by date.
+    """
+    if freq not in PERIOD_ALIASES:
+        raise ValueError(f"Unsupported frequency {freq!r}; expected one of {sorted(PERIOD_ALIASES)}")
+    frame = returns.to_frame() if isinstance(returns, pd.Series) else returns
+    if frame.empty:
+        return returns.iloc[:0]
+
+    cumulative = np.cumsum(np.log1p(np.nan_to_num(frame.to_numpy(dtype=np.float64), nan=0.0)), axis=0)
+    periods = frame.index.to_period(PERIOD_ALIASES[freq])
+    ordinals = periods.asi8
+    ends = np.append(np.flatnonzero(ordinals[1:] != ordinals[:-1]), len(ordinals) - 1)
+    period_growth = np.diff(cumulative[ends], axis=0, prepend=np.zeros((1, cumulative.shape[1])))
+    index = periods[ends].end_time.normalize()
+
+    if isinstance(returns, pd.Series):
+        return pd.Series(np.expm1(period_growth[:, 0]), index=index, name=returns.name)
+    return pd.DataFrame(np.expm1(period_growth), index=index, columns=frame.columns)
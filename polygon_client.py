@@ -0,0 +1,141 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+import instrumentation
+
+DEFAULT_BASE_URL = "https://api.polygon.io"
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+PAGE_LIMIT = 50000
+
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size):
+    """Returns a shared keep-alive session whose connection pool fits `pool_size` workers."""
+    global _session, _session_pool_size
+    with _session_lock:
+        if _session is None or _session_pool_size < pool_size:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            if _session is not None:
+                _session.close()
+            _session, _session_pool_size = session, pool_size
+        return _session
+
+
+def get_with_retry(session, url, headers, max_retries=3, backoff_factor=0.5, timeout=30):
+    """GETs `url`, retrying 429/5xx responses, connection errors and timeouts with exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            response = session.get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == max_retries:
+                raise
+            response = None
+        if response is not None and response.status_code not in RETRY_STATUS_CODES:
+            return response
+        if attempt == max_retries:
+            return response
+        delay = backoff_factor * (2 ** attempt)
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        time.sleep(delay)
+
+
+def fetch_ticker(session, ticker, start_date, end_date, api_key, base_url=DEFAULT_BASE_URL, max_retries=3, backoff_factor=0.5):
+    """Fetches daily closes for one ticker, following `next_url` pagination.
+
+    Returns a (timestamps, closes) pair of int64 epoch-millisecond and float64 arrays,
+    or None on failure. Each page is copied into arrays preallocated for the whole range
+    (there is at most one daily bar per calendar day) and then released.
+    """
+    capacity = max((date.fromisoformat(end_date) - date.fromisoformat(start_date)).days + 1, 1)
+    timestamps = np.empty(capacity, dtype=np.int64)
+    closes = np.empty(capacity, dtype=np.float64)
+    size = 0
+    nbytes = 0
+    url = f"{base_url}/v2/aggs/ticker/{ticker}/range/1/day/{start_date}/{end_date}?adjusted=true&sort=asc&limit={PAGE_LIMIT}"
+    headers = {'Authorization': f'Bearer {api_key}'}
+    while url:
+        try:
+            response = get_with_retry(session, url, headers, max_retries=max_retries, backoff_factor=backoff_factor)
+        except requests.RequestException as e:
+            logging.error(f"Failed to fetch data for {ticker}: {str(e)}")
+            return None
+        if response.status_code != 200:
+            logging.error(f"Failed to fetch data for {ticker}: {response.text}")
+            return None
+        nbytes += len(response.content)
+        page = response.json()
+        results = page.get('results', [])
+        count = len(results)
+        if size + count > capacity:
+            capacity = max(2 * capacity, size + count)
+            timestamps = np.resize(timestamps, capacity)
+            closes = np.resize(closes, capacity)
+        timestamps[size:size + count] = np.fromiter((result['t'] for result in results), dtype=np.int64, count=count)
+        closes[size:size + count] = np.fromiter((result['c'] for result in results), dtype=np.float64, count=count)
+        size += count
+        url = page.get('next_url')
+        del response, page, results
+    if size == 0:
+        logging.error(f"No data found for {ticker}")
+    instrumentation.record_fetch(ticker, nbytes, size)
+    return timestamps[:size].copy(), closes[:size].copy()
+
+
+def build_price_matrix(tickers, series):
+    """Aligns per-ticker (timestamps, closes) arrays into one price DataFrame in a single pass.
+
+    Tickers whose entry is None or empty are left out; missing dates are NaN.
+    """
+    present = [(ticker, bars) for ticker, bars in zip(tickers, series) if bars is not None and len(bars[0])]
+    if not present:
+        raise ValueError("No price data to combine")
+    index = np.unique(np.concatenate([bars[0] for _, bars in present]))
+    matrix = np.full((len(index), len(present)), np.nan)
+    for column, (_, (timestamps, closes)) in enumerate(present):
+        matrix[np.searchsorted(index, timestamps), column] = closes
+    return pd.DataFrame(matrix, index=pd.to_datetime(index, unit='ms'), columns=[ticker for ticker, _ in present])
+
+
+def fetch_ranges(ranges, api_key, base_url=DEFAULT_BASE_URL, max_workers=8, max_retries=3, backoff_factor=0.5):
+    """Fetches each (ticker, start_date, end_date) in `ranges` concurrently over a bounded worker pool.
+
+    Returns one (timestamps, closes) pair per range in the same order, None where the request failed.
+    """
+    if not ranges:
+        return []
+    workers = max(1, min(max_workers, len(ranges)))
+    session = get_session(workers)
+
+    def fetch(request):
+        ticker, start_date, end_date = request
+        return fetch_ticker(session, ticker, start_date, end_date, api_key, base_url=base_url, max_retries=max_retries, backoff_factor=backoff_factor)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fetch, ranges))
+
+
+def fetch_polygon_data(tickers, start_date, end_date, api_key, base_url=DEFAULT_BASE_URL, max_workers=8, max_retries=3, backoff_factor=0.5):
+    """Fetches daily closes for `tickers` concurrently into one aligned price DataFrame.
+
+    Columns keep the order of `tickers`; tickers that fail or have no bars are logged and left out.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    ranges = [(ticker, start_date, end_date) for ticker in tickers]
+    series = fetch_ranges(ranges, api_key, base_url=base_url, max_workers=max_workers, max_retries=max_retries, backoff_factor=backoff_factor)
+    return build_price_matrix(tickers, series)
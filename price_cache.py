@@ -0,0 +1,249 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+import instrumentation
+from polygon_client import build_price_matrix
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    t INTEGER NOT NULL,
+    c REAL NOT NULL,
+    PRIMARY KEY (ticker, t)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS coverage (
+    ticker TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_ticker ON coverage (ticker);
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+"""
+
+
+def to_ms(day, end_of_day=False):
+    """Converts a date to epoch milliseconds at the start (or end) of that UTC day."""
+    moment = datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+    if end_of_day:
+        moment += timedelta(days=1)
+    return int(moment.timestamp() * 1000) - (1 if end_of_day else 0)
+
+
+def from_ms(timestamp):
+    """Converts epoch milliseconds to the UTC date they fall on."""
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).date()
+
+
+def matches_anchor(bars, anchor, rtol=1e-6):
+    """Checks that freshly fetched `bars` repeat the stored anchor (t, close) bar."""
+    timestamps, closes = bars
+    t, close = anchor
+    position = np.searchsorted(timestamps, t)
+    return position < len(timestamps) and timestamps[position] == t and abs(closes[position] - close) <= rtol * abs(close)
+
+
+def merge_intervals(intervals):
+    """Merges overlapping or adjacent (start, end) date intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_intervals(covered, start, end):
+    """Returns the parts of [start, end] not covered by the merged `covered` intervals."""
+    gaps = []
+    cursor = start
+    for covered_start, covered_end in covered:
+        if covered_end < cursor:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > cursor:
+            gaps.append((cursor, covered_start - timedelta(days=1)))
+        cursor = max(cursor, covered_end + timedelta(days=1))
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class PriceCache:
+    """On-disk store of daily closes per ticker, with an index of the date ranges already fetched.
+
+    Requests are served from disk where the range is covered; only the missing date gaps
+    are fetched and merged in. Tickers are evicted when their data is older than
+    `max_age_days` or, least recently used first, when more than `max_tickers` are stored.
+    """
+
+    def __init__(self, path, max_age_days=7, max_tickers=1000):
+        self.path = path
+        self.max_age_days = max_age_days
+        self.max_tickers = max_tickers
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @property
+    def stats(self):
+        """Returns the hit/partial-hit/miss counters since this cache was created."""
+        return {'hits': self.hits, 'partial_hits': self.partial_hits, 'misses': self.misses}
+
+    def get_prices(self, tickers, start_date, end_date, fetch_ranges):
+        """Returns daily closes for `tickers` between `start_date` and `end_date` (YYYY-MM-DD).
+
+        `fetch_ranges` takes a list of (ticker, start_date, end_date) and returns one
+        (timestamps, closes) pair (or None on failure) per range; it is only called for
+        gaps missing from the cache.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+        # Bars for today may still change, so coverage is only recorded up to yesterday.
+        settled_end = min(end, date.today() - timedelta(days=1))
+        self.evict()
+
+        with self._connect() as conn:
+            gaps = []
+            for ticker in tickers:
+                rows = conn.execute("SELECT start_date, end_date FROM coverage WHERE ticker = ?", (ticker,)).fetchall()
+                covered = merge_intervals([(date.fromisoformat(s), date.fromisoformat(e)) for s, e in rows])
+                ticker_gaps = missing_intervals(covered, start, end)
+                with self._lock:
+                    if not ticker_gaps:
+                        self.hits += 1
+                        result = 'hit'
+                    elif covered and ticker_gaps != [(start, end)]:
+                        self.partial_hits += 1
+                        result = 'partial'
+                    else:
+                        self.misses += 1
+                        result = 'miss'
+                instrumentation.record_cache('prices', result)
+                gaps.extend((ticker, gap_start, gap_end) for gap_start, gap_end in ticker_gaps)
+
+            # Each gap reaches one stored bar into covered data, so a split or dividend adjustment
+            # published since that data was fetched shows up as a mismatched close.
+            anchors = [self._anchor_bar(conn, ticker, gap_start, gap_end) for ticker, gap_start, gap_end in gaps]
+
+        # Nothing is written before the fetches, so no write lock is held during network round trips.
+        ranges = []
+        for (ticker, gap_start, gap_end), anchor in zip(gaps, anchors):
+            if anchor is not None:
+                gap_start, gap_end = min(gap_start, from_ms(anchor[0])), max(gap_end, from_ms(anchor[0]))
+            ranges.append((ticker, gap_start.isoformat(), gap_end.isoformat()))
+        fetched = fetch_ranges(ranges) if ranges else []
+        readjusted = sorted({
+            ticker for (ticker, _, _), anchor, bars in zip(gaps, anchors, fetched)
+            if anchor is not None and bars is not None and not matches_anchor(bars, anchor)
+        })
+        if readjusted:
+            logging.info(f"Price cache refetching {len(readjusted)} tickers with revised adjustments: {readjusted}")
+            kept = [(gap, bars) for gap, bars in zip(gaps, fetched) if gap[0] not in readjusted]
+            refetched = fetch_ranges([(ticker, start.isoformat(), end.isoformat()) for ticker in readjusted])
+            gaps = [gap for gap, _ in kept] + [(ticker, start, end) for ticker in readjusted]
+            fetched = [bars for _, bars in kept] + list(refetched)
+
+        with self._connect() as conn:
+            for ticker in readjusted:
+                for table in ('bars', 'coverage', 'tickers'):
+                    conn.execute(f"DELETE FROM {table} WHERE ticker = ?", (ticker,))
+            now = time.time()
+            for (ticker, gap_start, gap_end), bars in zip(gaps, fetched):
+                if bars is None:
+                    continue
+                timestamps, closes = bars
+                conn.executemany(
+                    "INSERT OR REPLACE INTO bars (ticker, t, c) VALUES (?, ?, ?)",
+                    zip([ticker] * len(timestamps), timestamps.tolist(), closes.tolist()),
+                )
+                if gap_start <= settled_end:
+                    self._record_coverage(conn, ticker, gap_start, min(gap_end, settled_end))
+                conn.execute(
+                    "INSERT INTO tickers (ticker, fetched_at, accessed_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (ticker) DO UPDATE SET accessed_at = excluded.accessed_at",
+                    (ticker, now, now),
+                )
+
+            series = []
+            for ticker in tickers:
+                rows = conn.execute(
+                    "SELECT t, c FROM bars WHERE ticker = ? AND t BETWEEN ? AND ? ORDER BY t",
+                    (ticker, to_ms(start), to_ms(end, end_of_day=True)),
+                ).fetchall()
+                bars = np.array(rows, dtype=np.float64).reshape(-1, 2)
+                series.append((bars[:, 0].astype(np.int64), bars[:, 1]))
+            conn.execute(
+                f"UPDATE tickers SET accessed_at = ? WHERE ticker IN ({','.join('?' * len(tickers))})",
+                [now, *tickers],
+            )
+
+        logging.info(f"Price cache: {self.stats}")
+        return build_price_matrix(tickers, series)
+
+    def _anchor_bar(self, conn, ticker, gap_start, gap_end):
+        """Returns the stored (t, close) bar just before the gap, else just after it, or None."""
+        before = conn.execute(
+            "SELECT t, c FROM bars WHERE ticker = ? AND t < ? ORDER BY t DESC LIMIT 1", (ticker, to_ms(gap_start))
+        ).fetchone()
+        if before is not None:
+            return before
+        return conn.execute(
+            "SELECT t, c FROM bars WHERE ticker = ? AND t > ? ORDER BY t LIMIT 1", (ticker, to_ms(gap_end, end_of_day=True))
+        ).fetchone()
+
+    def _record_coverage(self, conn, ticker, start, end):
+        rows = conn.execute("SELECT start_date, end_date FROM coverage WHERE ticker = ?", (ticker,)).fetchall()
+        covered = merge_intervals([(date.fromisoformat(s), date.fromisoformat(e)) for s, e in rows] + [(start, end)])
+        conn.execute("DELETE FROM coverage WHERE ticker = ?", (ticker,))
+        conn.executemany(
+            "INSERT INTO coverage (ticker, start_date, end_date) VALUES (?, ?, ?)",
+            [(ticker, s.isoformat(), e.isoformat()) for s, e in covered],
+        )
+
+    def evict(self):
+        """Drops tickers whose data is too old, then the least recently used beyond `max_tickers`."""
+        with self._connect() as conn:
+            stale = []
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                stale += [row[0] for row in conn.execute("SELECT ticker FROM tickers WHERE fetched_at < ?", (cutoff,))]
+            if self.max_tickers is not None:
+                stale += [row[0] for row in conn.execute(
+                    "SELECT ticker FROM tickers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?", (self.max_tickers,)
+                )]
+            for ticker in set(stale):
+                for table in ('bars', 'coverage', 'tickers'):
+                    conn.execute(f"DELETE FROM {table} WHERE ticker = ?", (ticker,))
+            if stale:
+                logging.info(f"Price cache evicted {len(set(stale))} tickers")
@@ -0,0 +1,69 @@
+import hashlib
+import json
+
+import diskcache
+import pandas as pd
+
+
+def price_fingerprint(data):
+    """Hashes a price frame's values, dates and columns, so revised or extended data changes the key."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    digest.update(json.dumps([str(column) for column in data.columns]).encode())
+    return digest.hexdigest()
+
+
+def canonical_key(inputs, data):
+    """Builds a cache key from the optimization inputs (in any key order) and the price fingerprint."""
+    payload = json.dumps(inputs, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(f'{payload}|{price_fingerprint(data)}'.encode()).hexdigest()
+
+
+class ResultCache:
+    """Memo of optimization runs in three levels, shared across worker processes through a local directory.
+
+    The estimates level holds risk model estimates by universe, window and risk model
+    settings, so changing only the weight bounds or risk profile skips the estimation.
+    The results level holds solved weights, performance and frontier by optimization
+    inputs; the figures level holds the serialized figures and table of a full
+    dashboard response. Entries expire after `ttl` seconds and the least recently used are evicted
+    once a level exceeds `size_limit` bytes.
+    """
+
+    def __init__(self, path, ttl=3600, size_limit=2**28):
+        self.ttl = ttl
+        self._estimates = diskcache.Cache(f'{path}/estimates', eviction_policy='least-recently-used', size_limit=size_limit)
+        self._results = diskcache.Cache(f'{path}/results', eviction_policy='least-recently-used', size_limit=size_limit)
+        self._figures = diskcache.Cache(f'{path}/figures', eviction_policy='least-recently-used', size_limit=size_limit)
+        self._estimates.stats(enable=True)
+        self._results.stats(enable=True)
+        self._figures.stats(enable=True)
+
+    def get_estimate(self, key):
+        return self._estimates.get(key)
+
+    def set_estimate(self, key, estimate):
+        self._estimates.set(key, estimate, expire=self.ttl)
+
+    def get_results(self, key):
+        return self._results.get(key)
+
+    def set_results(self, key, results):
+        self._results.set(key, results, expire=self.ttl)
+
+    def get_figures(self, key):
+        return self._figures.get(key)
+
+    def set_figures(self, key, payload):
+        self._figures.set(key, payload, expire=self.ttl)
+
+    @property
+    def stats(self):
+        """Returns hit and miss counts per level, accumulated across every process using the directory."""
+        estimates_hits, estimates_misses = self._estimates.stats()
+        results_hits, results_misses = self._results.stats()
+        figures_hits, figures_misses = self._figures.stats()
+        return {
+            'estimates': {'hits': estimates_hits, 'misses': estimates_misses},
+            'results': {'hits': results_hits, 'misses': results_misses},
+            'figures': {'hits': figures_hits, 'misses': figures_misses},
+        }
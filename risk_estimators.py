@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+from pypfopt import risk_models
+
+TRADING_DAYS = 252
+RISK_MODELS = {
+    'sample': 'Sample Covariance',
+    'ledoit_wolf': 'Ledoit-Wolf Shrinkage',
+    'exponential': 'Exponentially Weighted',
+    'factor': 'Statistical Factor Model (PCA)',
+}
+
+
+class FactorCovariance:
+    """Covariance in factor form: loadings B (N x k), factor variances f (k) and specific variances d (N).
+
+    The implied covariance is B diag(f) B' + diag(d); `to_dense` builds it when a full
+    matrix is needed.
+    """
+
+    def __init__(self, loadings, factor_variances, specific_variances, tickers):
+        self.loadings = loadings
+        self.factor_variances = factor_variances
+        self.specific_variances = specific_variances
+        self.tickers = list(tickers)
+
+    @property
+    def factor_root(self):
+        """Returns B diag(f)^1/2, so that the factor covariance is factor_root @ factor_root.T."""
+        return self.loadings * np.sqrt(self.factor_variances)
+
+    def to_dense(self):
+        root = self.factor_root
+        return pd.DataFrame(root @ root.T + np.diag(self.specific_variances), index=self.tickers, columns=self.tickers)
+
+
+def returns_matrix(prices):
+    """Daily returns as a float64 array, dropping all-NaN rows and counting other gaps as zero returns."""
+    return prices.pct_change().dropna(how='all').fillna(0.0).to_numpy(dtype=np.float64)
+
+
+def ledoit_wolf(returns, frequency=TRADING_DAYS):
+    """Ledoit-Wolf shrinkage of the sample covariance towards a scaled identity."""
+    n_samples, n_features = returns.shape
+    centered = returns - returns.mean(axis=0)
+    empirical = centered.T @ centered / n_samples
+    variances = np.diag(empirical)
+    scale = variances.mean()
+    squared = centered ** 2
+    beta = (np.sum(squared.T @ squared) / n_samples - np.sum(empirical ** 2)) / n_samples
+    delta = np.sum((empirical - scale * np.eye(n_features)) ** 2)
+    shrinkage = 0.0 if delta == 0 else min(beta, delta) / delta
+    shrunk = (1 - shrinkage) * empirical
+    shrunk[np.diag_indices(n_features)] += shrinkage * scale
+    return shrunk * frequency
+
+
+def exponential_covariance(returns, span=180, frequency=TRADING_DAYS):
+    """Exponentially weighted covariance giving recent returns more weight, as `risk_models.exp_cov` does."""
+    decay = 1 - 2 / (span + 1)
+    weights = decay ** np.arange(len(returns) - 1, -1, -1)
+    centered = returns - returns.mean(axis=0)
+    return (centered * weights[:, None]).T @ centered / weights.sum() * frequency
+
+
+def top_singular_vectors(matrix, k, oversamples=10, power_iterations=7, seed=0):
+    """Returns the `k` largest singular values and right singular vectors of `matrix`.
+
+    Uses a randomized range finder with power iterations (Halko et al.), costing
+    O(T N (k + oversamples)) per iteration instead of forming the N x N Gram matrix;
+    small matrices fall back to an exact SVD.
+    """
+    if k + oversamples >= min(matrix.shape):
+        _, singular_values, components = np.linalg.svd(matrix, full_matrices=False)
+        return singular_values[:k], components[:k]
+    rng = np.random.default_rng(seed)
+    sketch = matrix @ rng.standard_normal((matrix.shape[1], k + oversamples))
+    for _ in range(power_iterations):
+        # Re-orthonormalizing between products keeps the small singular directions from being lost to rounding.
+        sketch, _ = np.linalg.qr(sketch)
+        sketch = matrix @ (matrix.T @ sketch)
+    basis, _ = np.linalg.qr(sketch)
+    _, singular_values, components = np.linalg.svd(basis.T @ matrix, full_matrices=False)
+    return singular_values[:k], components[:k]
+
+
+def factor_covariance(returns, tickers, n_factors=10, frequency=TRADING_DAYS):
+    """Statistical factor model from the top `n_factors` principal components of the returns.
+
+    The components come from a truncated SVD of the centered T x N return matrix, so the
+    N x N sample covariance is never formed. The residual variance left by the factors
+    becomes each asset's specific variance.
+    """
+    centered = returns - returns.mean(axis=0)
+    n_factors = min(n_factors, *centered.shape)
+    singular_values, components = top_singular_vectors(centered, n_factors)
+    loadings = components.T
+    factor_variances = singular_values ** 2 / (len(returns) - 1) * frequency
+    total_variances = np.einsum('ij,ij->j', centered, centered) / (len(returns) - 1) * frequency
+    specific_variances = np.maximum(total_variances - (loadings ** 2) @ factor_variances, 1e-10)
+    return FactorCovariance(loadings, factor_variances, specific_variances, tickers)
+
+
+def estimate_risk_model(prices, method='sample', n_factors=10, span=180):
+    """Estimates the covariance of `prices` with `method`, one of RISK_MODELS.
+
+    Returns a DataFrame, or a FactorCovariance for 'factor'.
+    """
+    if method not in RISK_MODELS:
+        raise ValueError(f"Unknown risk model {method!r}; expected one of {sorted(RISK_MODELS)}")
+
+    tickers = list(prices.columns)
+    if method == 'sample':
+        # pypfopt's pairwise-complete covariance, so tickers with different listing dates keep their baseline estimate.
+        estimate = risk_models.sample_cov(prices)
+    elif method == 'factor':
+        estimate = factor_covariance(returns_matrix(prices), tickers, n_factors=n_factors)
+    else:
+        estimator = {'ledoit_wolf': ledoit_wolf, 'exponential': lambda r: exponential_covariance(r, span=span)}[method]
+        estimate = pd.DataFrame(estimator(returns_matrix(prices)), index=tickers, columns=tickers)
+    return estimate
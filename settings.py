@@ -0,0 +1,38 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+JOB_CACHE_PATH = os.environ.get('JOB_CACHE_PATH', os.path.join('.cache', 'jobs'))
+
+API_KEY = os.environ.get('POLYGON_API_KEY')
+if not API_KEY:
+    raise ValueError("POLYGON_API_KEY environment variable not set.")
+
+POLYGON_BASE_URL = os.environ.get('POLYGON_BASE_URL', 'https://api.polygon.io')
+POLYGON_MAX_WORKERS = int(os.environ.get('POLYGON_MAX_WORKERS', 8))
+POLYGON_MAX_RETRIES = int(os.environ.get('POLYGON_MAX_RETRIES', 3))
+POLYGON_BACKOFF = float(os.environ.get('POLYGON_BACKOFF', 0.5))
+
+PRICE_CACHE_PATH = os.environ.get('PRICE_CACHE_PATH', os.path.join('.cache', 'prices.sqlite'))
+PRICE_CACHE_MAX_AGE_DAYS = float(os.environ.get('PRICE_CACHE_MAX_AGE_DAYS', 7))
+PRICE_CACHE_MAX_TICKERS = int(os.environ.get('PRICE_CACHE_MAX_TICKERS', 1000))
+
+BACKTEST_WINDOW = int(os.environ.get('BACKTEST_WINDOW', 252))
+BACKTEST_REBALANCE = os.environ.get('BACKTEST_REBALANCE', 'M')
+BACKTEST_EXPANDING = bool(int(os.environ.get('BACKTEST_EXPANDING', 0)))
+BACKTEST_COST_BPS = float(os.environ.get('BACKTEST_COST_BPS', 0))
+BACKTEST_WORKERS = int(os.environ.get('BACKTEST_WORKERS', 1)) or None
+
+RESULT_CACHE_PATH = os.environ.get('RESULT_CACHE_PATH', os.path.join('.cache', 'results'))
+RESULT_CACHE_TTL = int(os.environ.get('RESULT_CACHE_TTL', 3600))
+RESULT_CACHE_SIZE_MB = int(os.environ.get('RESULT_CACHE_SIZE_MB', 256))
+
+FIGURE_POINT_BUDGET = int(os.environ.get('FIGURE_POINT_BUDGET', 1000))
+WEBGL_POINT_THRESHOLD = int(os.environ.get('WEBGL_POINT_THRESHOLD', 20000))
+
+RISK_FACTORS = int(os.environ.get('RISK_FACTORS', 10))
+RISK_EWMA_SPAN = int(os.environ.get('RISK_EWMA_SPAN', 180))
+
+METRICS_PATH = os.environ.get('METRICS_PATH', os.path.join('.cache', 'metrics'))
+PROFILE_PATH = os.environ.get('PROFILE_PATH', os.path.join('.cache', 'profiles'))